@@ -0,0 +1,142 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from src.processing.alignment import window_center_times
+from src.processing.feature_extraction import FEATURE_NAMES, batch_feature_tensor
+from src.processing.pipeline import run_stages
+from src.storage.loader import read_recording
+
+# Same defaults as the EMG page: no filters, all features, 200/50 sample windows
+DEFAULT_SPEC = {
+    "fs": 2000,
+    "butterworth": None,   # e.g. {"fs": 1000, "filter_type": "low", "cutoff": 450}
+    "notch": None,         # e.g. {"fs": 1000, "notch_freq": 50}
+    "rectify": False,
+    "smoothing": "none",   # 'sg', 'mav', 'rms' or 'gaussian'
+    "normalize": False,
+    "features": FEATURE_NAMES,   # may include SPECTRAL_FEATURE_NAMES, e.g. "MDF"
+    "frame": 200,
+    "step": 50,
+}
+
+# Marker written into a finished partition; holds the hash of the spec used
+SUCCESS_FILE = "_SUCCESS"
+
+
+def load_spec(spec_path=None):
+    """Read a pipeline spec (JSON) on top of DEFAULT_SPEC."""
+    spec = dict(DEFAULT_SPEC)
+    if spec_path:
+        with open(spec_path) as file:
+            spec.update(json.load(file))
+    unknown = set(spec) - set(DEFAULT_SPEC)
+    if unknown:
+        raise ValueError(f"Unknown spec keys: {sorted(unknown)}")
+    return spec
+
+
+def spec_hash(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def spec_params(spec):
+    """Translate a spec into (stage, param) pairs for the processing pipeline."""
+    butterworth = spec["butterworth"]
+    notch = spec["notch"]
+    cutoff = butterworth and butterworth["cutoff"]
+    return (
+        ("butterworth", (butterworth["fs"], butterworth["filter_type"],
+                         tuple(cutoff) if isinstance(cutoff, list) else cutoff) if butterworth else None),
+        ("notch", (notch["fs"], notch["notch_freq"]) if notch else None),
+        ("rectify", spec["rectify"]),
+        ("smoothing", spec["smoothing"]),
+        ("normalize", spec["normalize"]),
+    )
+
+
+def partition_dir(out_dir, recording_path):
+    name = os.path.splitext(os.path.basename(recording_path))[0]
+    return os.path.join(out_dir, f"recording={name}")
+
+
+def is_done(out_dir, recording_path, digest):
+    marker = os.path.join(partition_dir(out_dir, recording_path), SUCCESS_FILE)
+    if not os.path.isfile(marker):
+        return False
+    with open(marker) as file:
+        return file.read().strip() == digest
+
+
+def feature_table(data, spec):
+    """Process every channel of a recording into a long table of window features."""
+    params = spec_params(spec)
+    processed = np.stack([run_stages(np.asarray(channel), params) for channel in data['emg']])
+    tensor = batch_feature_tensor(processed, spec["frame"], spec["step"], spec["features"], workers=1, fs=spec["fs"])
+    n_channels, n_windows, n_features = tensor.shape
+
+    table = pd.DataFrame(tensor.reshape(-1, n_features), columns=spec["features"])
+    table.insert(0, "channel", np.repeat(np.arange(n_channels, dtype=np.int32), n_windows))
+    table.insert(1, "time", np.tile(window_center_times(n_windows, spec["frame"], spec["step"], spec["fs"]), n_channels))
+    return table
+
+
+def process_recording(recording_path, out_dir, spec):
+    """Write the feature table of one recording as a Parquet partition."""
+    started = time.perf_counter()
+    table = feature_table(read_recording(recording_path), spec)
+
+    target = partition_dir(out_dir, recording_path)
+    os.makedirs(target, exist_ok=True)
+    part = os.path.join(target, "part-0.parquet")
+    table.to_parquet(part + ".tmp", engine="pyarrow", index=False)
+    os.replace(part + ".tmp", part)
+    with open(os.path.join(target, SUCCESS_FILE), "w") as file:
+        file.write(spec_hash(spec))
+    return len(table), time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract EMG features from a directory of .pkl recordings into a partitioned Parquet dataset.")
+    parser.add_argument("input_dir", help="Directory containing myocontrol .pkl files")
+    parser.add_argument("output_dir", help="Parquet dataset directory (one recording=<name> partition per file)")
+    parser.add_argument("--spec", help="JSON pipeline spec; keys as in DEFAULT_SPEC")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel processes")
+    parser.add_argument("--force", action="store_true", help="Reprocess recordings that are already done")
+    args = parser.parse_args(argv)
+
+    spec = load_spec(args.spec)
+    digest = spec_hash(spec)
+    recordings = sorted(glob.glob(os.path.join(args.input_dir, "*.pkl")))
+    todo = [path for path in recordings if args.force or not is_done(args.output_dir, path, digest)]
+    print(f"{len(recordings)} recordings, {len(recordings) - len(todo)} already done, {len(todo)} to process (spec {digest})")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, "_spec.json"), "w") as file:
+        json.dump(spec, file, indent=2)
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(process_recording, path, args.output_dir, spec): path for path in todo}
+        for done, future in enumerate(as_completed(futures), start=1):
+            name = os.path.basename(futures[future])
+            try:
+                rows, seconds = future.result()
+                print(f"[{done}/{len(todo)}] {name}: {rows} rows in {seconds:.1f} s")
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(todo)}] {name}: FAILED ({e})")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
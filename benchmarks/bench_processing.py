@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import scipy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.processing.butterworth_filter import process_with_butterworth
+from src.processing.notch_filter import process_with_notch
+from src.processing.rectification import rectify_signal
+from src.processing.smoothing import apply_smoothing
+from src.processing.feature_extraction import FEATURE_NAMES, SPECTRAL_FEATURE_NAMES, sliding_window_features
+from src.processing.threshold import get_threshold
+from src.processing.comparisonforce import generate_force_comparison_figure
+
+SMOOTHING_METHODS = ["sg", "mav", "rms", "gaussian"]
+THRESHOLD_METHODS = ["fixed", "mean_std", "percentile"]
+
+
+def synthetic_emg(n_channels, duration, fs, seed=0):
+    """Noise bursts (contractions) on a low baseline plus 50 Hz hum, shape (channels, samples)."""
+    rng = np.random.default_rng(seed)
+    n = int(duration * fs)
+    t = np.arange(n) / fs
+    envelope = 0.05 + (np.sin(2 * np.pi * 0.2 * t) > 0.3)
+    hum = 0.02 * np.sin(2 * np.pi * 50 * t)
+    return rng.standard_normal((n_channels, n)) * envelope * 0.2 + hum
+
+
+def synthetic_force(duration, fs=100):
+    """Force table with the columns used by generate_force_comparison_figure."""
+    t = np.arange(int(duration * fs)) / fs
+    target = np.clip(np.sin(2 * np.pi * 0.1 * t), 0, None) * 10
+    return pd.DataFrame({
+        "Time (s)": t,
+        "Target Flexion(N)": target,
+        "Actual Flexion(N)": target + np.random.default_rng(0).normal(0, 0.5, len(t)),
+        "Target Extension(N)": target[::-1],
+        "Actual Extension(N)": target[::-1] + np.random.default_rng(1).normal(0, 0.5, len(t)),
+    })
+
+
+def benchmark_cases(emg, duration, fs):
+    """Yield (name, callable) pairs for one input size."""
+    channel = emg[0]
+    yield "process_with_butterworth", lambda: process_with_butterworth(emg, fs)
+    yield "process_with_notch", lambda: process_with_notch(emg, fs, 50)
+    yield "rectify_signal", lambda: rectify_signal(emg)
+    for method in SMOOTHING_METHODS:
+        yield f"apply_smoothing[{method}]", lambda method=method: apply_smoothing(channel, method=method)
+    # Envelope-sized windows on all channels at once
+    yield "apply_smoothing[mav,500,all]", lambda: apply_smoothing(emg, method='mav', window_size=500)
+    yield "apply_smoothing[sg,501,all]", lambda: apply_smoothing(emg, method='sg', window_length=501)
+    for feature in FEATURE_NAMES:
+        yield f"sliding_window_features[{feature}]", lambda feature=feature: sliding_window_features(channel, selected_features=[feature])
+    yield "sliding_window_features[spectral]", lambda: sliding_window_features(channel, selected_features=SPECTRAL_FEATURE_NAMES, fs=fs)
+    values = sliding_window_features(channel, selected_features=["RMS"])["RMS"].to_numpy()
+    for method in THRESHOLD_METHODS:
+        yield f"get_threshold[{method}]", lambda method=method: get_threshold("RMS", values, method=method)
+    force = synthetic_force(duration)
+    yield "generate_force_comparison_figure", lambda: generate_force_comparison_figure(force)
+
+
+def time_call(func, repeat, min_time=0.2):
+    """Best and median wall time of func over `repeat` runs (more runs for very fast calls)."""
+    func()  # warm-up (imports, filter design caches)
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < repeat or (time.perf_counter() < deadline and len(timings) < 100 * repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {"min": min(timings), "median": statistics.median(timings), "runs": len(timings)}
+
+
+def run(args):
+    results = {}
+    for duration in args.durations:
+        emg = synthetic_emg(args.channels, duration, args.fs)
+        size = f"ch={args.channels},dur={duration:g}s,fs={args.fs:g}"
+        for name, func in benchmark_cases(emg, duration, args.fs):
+            if args.filter and args.filter not in name:
+                continue
+            key = f"{name}|{size}"
+            results[key] = time_call(func, args.repeat)
+            print(f"{key:70s} {results[key]['min'] * 1000:10.3f} ms")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the cases whose best time is more than `tolerance` slower than the baseline."""
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]["min"]
+        ratio = result["min"] / before if before > 0 else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append((key, before, result["min"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for src/processing on synthetic EMG.")
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--durations", type=float, nargs="+", default=[10, 60, 300], help="Signal durations in seconds")
+    parser.add_argument("--fs", type=float, default=2000, help="Sampling rate in Hz")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="Only run cases whose name contains this string")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs. baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for key, before, after, ratio in regressions:
+            print(f"REGRESSION {key}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
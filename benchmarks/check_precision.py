@@ -0,0 +1,133 @@
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_processing import SMOOTHING_METHODS, synthetic_emg
+from src.processing.feature_extraction import ALL_FEATURE_NAMES, FEATURE_NAMES, extract_features, sliding_window_feature_matrix
+from src.processing.pipeline import run_stages
+from src.processing.precision import get_precision, set_precision
+from src.storage.shared_cache import SharedDatasetCache
+
+# Features that count events or pick a spectral bin: a value close to a
+# threshold or a near-tie between bins may flip, so only the share of
+# windows that differ is bounded
+DISCRETE_FEATURES = {"Zero Crossing", "WAMP", "MYOP", "MDF", "PKF"}
+
+
+def pipeline_cases(fs, frame=200, step=50):
+    """Yield (name, params) for the processing chains offered by the EMG page."""
+    filters = (("butterworth", (fs, 'bandpass', (20, 450))), ("notch", (fs, 50)), ("rectify", True))
+    for method in SMOOTHING_METHODS:
+        yield f"smoothing[{method}]", filters + (("smoothing", method), ("normalize", True))
+    base = filters + (("smoothing", "rms"), ("normalize", True))
+    for feature in ALL_FEATURE_NAMES:
+        yield f"features[{feature}]", base + (("features", (feature, frame, step, fs)),)
+
+
+def drifting_signal(n=2_000_000, seed=0):
+    """Ramp from 0 to 1000 with little noise: window means far from the global mean and from zero."""
+    rng = np.random.default_rng(seed)
+    return np.linspace(0, 1000, n) + rng.standard_normal(n) * 0.01
+
+
+def reference_deviation(signal, frame=200, step=50, every=97):
+    """Largest relative deviation per feature of sliding_window_feature_matrix from extract_features (every n-th window)."""
+    matrix = sliding_window_feature_matrix(signal, frame, step, FEATURE_NAMES)
+    windows = np.arange(0, len(matrix), every)
+    reference = np.array([[extract_features(signal[k * step:k * step + frame], FEATURE_NAMES)[name] for name in FEATURE_NAMES]
+                          for k in windows])
+    scale = np.maximum(np.abs(reference), np.finfo(np.float64).tiny)
+    return dict(zip(FEATURE_NAMES, np.max(np.abs(matrix[windows] - reference) / scale, axis=0)))
+
+
+def load_in(precision, cache, file_path):
+    """Convert and memory-map a pickled recording the way the app loads it in this precision."""
+    previous = get_precision()
+    set_precision(precision)
+    try:
+        cache.add("check-precision", file_path)
+        return cache.open("check-precision")
+    finally:
+        set_precision(previous)
+
+
+def run_in(precision, signal, params):
+    previous = get_precision()
+    set_precision(precision)
+    try:
+        return run_stages(signal, params)
+    finally:
+        set_precision(previous)
+
+
+def deviation(reference, result):
+    """Largest absolute deviation relative to the largest reference magnitude, and the share of differing values."""
+    reference = np.asarray(reference, dtype=np.float64)
+    result = np.asarray(result, dtype=np.float64)
+    scale = np.max(np.abs(reference)) or 1.0
+    return np.max(np.abs(result - reference)) / scale, np.mean(~np.isclose(result, reference, rtol=1e-6, atol=0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bound the deviation of float32 loading and processing from float64 on synthetic EMG.")
+    parser.add_argument("--duration", type=float, default=60, help="Signal duration in seconds")
+    parser.add_argument("--fs", type=float, default=2000, help="Sampling rate in Hz")
+    parser.add_argument("--tolerance", type=float, default=1e-5, help="Allowed deviation relative to the signal's peak")
+    parser.add_argument("--discrete-tolerance", type=float, default=0.01, help="Allowed share of windows that differ for counting/bin features")
+    parser.add_argument("--reference-tolerance", type=float, default=1e-9,
+                        help="Allowed relative deviation of the vectorized features from extract_features on a drifting signal")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Both modes start from the same pickled recording, so float32 mode
+        # includes the narrowing of the samples when the recording is loaded
+        file_path = os.path.join(tmp, "recording.pkl")
+        with open(file_path, "wb") as file:
+            pickle.dump({"emg": synthetic_emg(1, args.duration, args.fs)}, file)
+        cache = SharedDatasetCache(cache_dir=os.path.join(tmp, "cache"))
+        signals = {precision: np.array(load_in(precision, cache, file_path)["emg"][0]) for precision in ("float64", "float32")}
+
+    failures = 0
+    if signals["float32"].dtype != np.float32:
+        print(f"FAIL load: float32 mode loaded {signals['float32'].dtype} samples")
+        failures += 1
+    for name, params in pipeline_cases(args.fs):
+        reference = run_in("float64", signals["float64"], params)
+        result = run_in("float32", signals["float32"], params)
+        if result.dtype != np.float32:
+            print(f"FAIL {name}: float32 mode returned {result.dtype}")
+            failures += 1
+            continue
+        relative, changed = deviation(reference, result)
+        discrete = any(feature in name for feature in DISCRETE_FEATURES)
+        ok = changed <= args.discrete_tolerance if discrete else relative <= args.tolerance
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:40s} max rel. deviation {relative:.2e}, differing {changed:.2%}")
+
+    # float64 fast path against the per-window reference, where sums of x and x² would cancel
+    previous = get_precision()
+    set_precision("float64")
+    try:
+        drift = reference_deviation(drifting_signal())
+    finally:
+        set_precision(previous)
+    for feature, relative in drift.items():
+        ok = relative <= args.reference_tolerance
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {f'drift[{feature}]':40s} max rel. deviation from extract_features {relative:.2e}")
+
+    if failures:
+        print(f"{failures} case(s) exceed the tolerance")
+        return 1
+    print("float32 results are within tolerance of float64, vectorized features match extract_features")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy libraries that must only be imported on first use, not at startup
+# (the PIL package itself is loaded by plotly; only PIL.Image is heavy)
+DEFERRED_MODULES = ["scipy", "pandas", "PIL.Image", "plotly.subplots", "pyarrow"]
+
+
+def import_profile(module, cwd):
+    """
+    Import module in a fresh interpreter under -X importtime.
+
+    Returns:
+        list: (name, depth, self_us, cumulative_us) per imported module, in import order.
+    """
+    # Same module search path as `python src/app.py` run from the repository root
+    search_path = [os.path.join(ROOT, "src"), ROOT, os.environ.get("PYTHONPATH")]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, search_path)))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def summarize(entries, module, top):
+    """Total import time of module, its most expensive direct imports and the deferred modules it loaded."""
+    total = next(cumulative for name, depth, _, cumulative in entries if name == module and depth == 0)
+    direct = sorted(((name, cumulative) for name, depth, _, cumulative in entries if depth == 1), key=lambda item: -item[1])
+    loaded = {name for name, *_ in entries}
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    return {"total_ms": total / 1000, "top": [(name, us / 1000) for name, us in direct[:top]], "eager": eager}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import time of the Dash app (python -X importtime).")
+    parser.add_argument("--module", default="app", help="Module to import (default: the Dash app)")
+    parser.add_argument("--cwd", default=ROOT, help="Working directory (assets are resolved relative to it)")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to run; the fastest one is reported")
+    parser.add_argument("--top", type=int, default=10, help="Number of direct imports to list")
+    parser.add_argument("--budget", type=float, help="Fail if the import takes longer than this many milliseconds")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    runs = [summarize(import_profile(args.module, args.cwd), args.module, args.top) for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: run["total_ms"])
+
+    print(f"import {args.module}: {best['total_ms']:.1f} ms (best of {args.repeat})")
+    for name, ms in best["top"]:
+        print(f"  {name:50s} {ms:10.1f} ms")
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "args": vars(args),
+            },
+            "result": best,
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    status = 0
+    if best["eager"]:
+        print(f"Imported at startup but should be deferred to first use: {', '.join(best['eager'])}")
+        status = 1
+    if args.budget is not None and best["total_ms"] > args.budget:
+        print(f"OVER BUDGET: {best['total_ms']:.1f} ms > {args.budget:.1f} ms")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
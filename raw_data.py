@@ -1,11 +1,10 @@
-import pickle
 import matplotlib.pyplot as plt
 
+from src.storage.loader import read_recording
+
 def load_data(file_path):
-    """Load raw EMG data from a .pkl file."""
-    with open(file_path, 'rb') as file:
-        data = pickle.load(file)
-    return data
+    """Load raw EMG data from a .pkl file or its memory-mapped columnar store."""
+    return read_recording(file_path)
 
 def plot_raw_emg(emg_data, channel_index=0):
     """Plot raw EMG signal for the selected channel."""
@@ -1,20 +1,55 @@
+import os
+import tempfile
+import uuid
+
 import dash
-from dash import html, dcc, page_container
+import diskcache
+from dash import html, dcc, page_container, Input, Output, State, DiskcacheManager
 import dash_bootstrap_components as dbc
 
+from src.metrics import register_routes as register_metrics_routes
+from src.storage.spool import register_routes as register_spool_routes
+from src.storage.upload_store import register_routes as register_upload_routes
+
+# Heavy callbacks (EMG processing and features) run as background jobs; their
+# progress and results are exchanged through this on-disk cache
+CALLBACK_CACHE_DIR = os.environ.get("EMG_CALLBACK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "emg-dash-callbacks"))
+background_callback_manager = DiskcacheManager(diskcache.Cache(CALLBACK_CACHE_DIR))
+
+# Static files served under /assets (the repository's assets directory, wherever the app is started from)
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
 # ✅ Add suppress_callback_exceptions=True
 app = dash.Dash(
     __name__,
     use_pages=True,
     external_stylesheets=[dbc.themes.BOOTSTRAP],
-    suppress_callback_exceptions=True
+    suppress_callback_exceptions=True,
+    background_callback_manager=background_callback_manager,
+    assets_folder=ASSETS_DIR
 )
 
 server = app.server
+register_upload_routes(server)
+register_spool_routes(server)
+register_metrics_routes(server)
 
 app.layout = html.Div([
+    # Per-tab session id; uploads are only visible to the session that made them
+    dcc.Store(id='session-id', storage_type='session'),
     page_container
 ], style={"backgroundColor": "#001f3f", "padding": "60px"})
 
+
+@app.callback(
+    Output('session-id', 'data'),
+    Input('session-id', 'modified_timestamp'),
+    State('session-id', 'data')
+)
+def assign_session_id(_, session_id):
+    if session_id:
+        raise dash.exceptions.PreventUpdate
+    return uuid.uuid4().hex
+
 if __name__ == "__main__":
     app.run_server(debug=True)
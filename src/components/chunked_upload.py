@@ -0,0 +1,90 @@
+import json
+
+import dash
+from dash import dcc, html, Input, Output, State
+
+from src.storage.spool import CHUNK_BYTES
+
+# Browser side of the /api/uploads protocol (see src/storage/spool.py).
+# Opens a file picker, sends the file in chunks and resumes an unfinished
+# upload of the same file from the offset the server reports. Progress is
+# written to <prefix>-status; the result is {upload_id, filename}.
+_UPLOAD_JS = """
+async function(nClicks, sessionId) {
+    const prefix = %(prefix)s;
+    const setStatus = (text) => window.dash_clientside.set_props(prefix + '-status', {children: text});
+    const file = await new Promise((resolve) => {
+        const input = document.createElement('input');
+        input.type = 'file';
+        input.accept = %(accept)s;
+        input.onchange = () => resolve(input.files[0]);
+        input.click();
+    });
+    if (!file || !sessionId) {
+        return window.dash_clientside.no_update;
+    }
+    const readStatus = async (response) => {
+        if (!response.ok && response.status !== 409) {
+            throw new Error(response.status + ' ' + response.statusText);
+        }
+        return response.json();
+    };
+    try {
+        const resumeKey = 'chunked-upload:' + [file.name, file.size, file.lastModified].join(':');
+        let status = null;
+        const previous = window.sessionStorage.getItem(resumeKey);
+        if (previous) {
+            const response = await fetch('/api/uploads/' + previous);
+            status = response.ok ? await response.json() : null;
+        }
+        if (!status) {
+            status = await fetch('/api/uploads', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({session_id: sessionId, filename: file.name, size: file.size})
+            }).then(readStatus);
+            window.sessionStorage.setItem(resumeKey, status.upload_id);
+        }
+        const chunkBytes = status.chunk_bytes || %(chunk_bytes)d;
+        while (status.received < file.size) {
+            const chunk = file.slice(status.received, status.received + chunkBytes);
+            status = await fetch('/api/uploads/' + status.upload_id + '?offset=' + status.received, {
+                method: 'PUT',
+                body: chunk
+            }).then(readStatus);
+            setStatus('Uploading ' + file.name + ': ' + Math.floor(100 * status.received / Math.max(file.size, 1)) + '%%');
+        }
+        window.sessionStorage.removeItem(resumeKey);
+        setStatus('Uploaded ' + file.name);
+        return {upload_id: status.upload_id, filename: file.name};
+    } catch (e) {
+        setStatus('Upload of ' + file.name + ' failed (' + e.message + '), click again to resume');
+        return window.dash_clientside.no_update;
+    }
+}
+"""
+
+
+def chunked_upload(id_prefix, label, style=None):
+    """
+    Upload button streaming a file to the server's upload spool.
+
+    The finished upload is published as {'upload_id', 'filename'} in
+    dcc.Store '<id_prefix>-handle'; register_chunked_upload wires the button.
+    """
+    return html.Div([
+        html.Button(label, id=f"{id_prefix}-button", n_clicks=0, style=style),
+        html.Div(id=f"{id_prefix}-status", style={'fontSize': '12px', 'marginBottom': '20px'}),
+        dcc.Store(id=f"{id_prefix}-handle"),
+    ])
+
+
+def register_chunked_upload(id_prefix, accept):
+    """Register the clientside callback of a chunked_upload; accept is e.g. '.pkl'."""
+    dash.clientside_callback(
+        _UPLOAD_JS % {'prefix': json.dumps(id_prefix), 'accept': json.dumps(accept), 'chunk_bytes': CHUNK_BYTES},
+        Output(f"{id_prefix}-handle", 'data'),
+        Input(f"{id_prefix}-button", 'n_clicks'),
+        State('session-id', 'data'),
+        prevent_initial_call=True
+    )
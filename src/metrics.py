@@ -0,0 +1,225 @@
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import flask
+
+# Histogram buckets for durations (s) and payload sizes (bytes)
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+
+# Background callbacks run in short-lived job processes; they leave their
+# observations here and the next /metrics request of a server process adds them
+METRICS_SPOOL_DIR = os.environ.get("EMG_METRICS_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "emg-metrics-spool"))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{str(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with one series per label set."""
+
+    def __init__(self, name, help_text, buckets, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels[name]) for name in self.label_names)
+        with self._lock:
+            counts, total, count = self._series.get(key, ((0,) * len(self.buckets), 0.0, 0))
+            counts = tuple(bucket_count + (value <= bound) for bucket_count, bound in zip(counts, self.buckets))
+            self._series[key] = (counts, total + value, count + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._series)
+
+    def since(self, snapshot):
+        """Return [labels, counts, sum, count] of the observations made after snapshot()."""
+        delta = []
+        for key, (counts, total, count) in self.snapshot().items():
+            old_counts, old_total, old_count = snapshot.get(key, ((0,) * len(self.buckets), 0.0, 0))
+            if count > old_count:
+                delta.append([key, [new - old for new, old in zip(counts, old_counts)], total - old_total, count - old_count])
+        return delta
+
+    def merge(self, delta):
+        """Add observations returned by since() (e.g. from another process)."""
+        with self._lock:
+            for key, added_counts, added_total, added_count in delta:
+                key = tuple(tuple(pair) for pair in key)
+                counts, total, count = self._series.get(key, ((0,) * len(self.buckets), 0.0, 0))
+                counts = tuple(old + new for old, new in zip(counts, added_counts))
+                self._series[key] = (counts, total + added_total, count + added_count)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, (counts, total, count) in series:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', f'{bound:g}'),))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+callback_seconds = Histogram(
+    "emg_callback_duration_seconds", "Wall time of Dash callback functions.", SECONDS_BUCKETS, ("callback",))
+stage_seconds = Histogram(
+    "emg_pipeline_stage_duration_seconds", "Wall time of EMG processing pipeline stages.", SECONDS_BUCKETS, ("stage",))
+serialization_seconds = Histogram(
+    "emg_response_serialization_seconds",
+    "Time of a Dash callback request spent outside the callback (mostly figure serialization).",
+    SECONDS_BUCKETS, ("output",))
+payload_bytes = Histogram(
+    "emg_response_payload_bytes", "Size of Dash callback responses.", BYTES_BUCKETS, ("output",))
+
+HISTOGRAMS = [callback_seconds, stage_seconds, serialization_seconds, payload_bytes]
+
+# Caches whose hit/miss counters are exported, by name
+_caches = {}
+
+
+def register_cache(name, cache):
+    """Export the stats() of an LRUCache-like object under cache="name"."""
+    _caches[name] = cache
+
+
+def timed_callback(func):
+    """
+    Record the wall time of a Dash callback (apply below @dash.callback).
+
+    Background callbacks run in a job process forked from the request; what
+    they record (including pipeline stages) is spooled for the server
+    processes.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        in_request = _in_server_request()
+        before = None if in_request else [histogram.snapshot() for histogram in HISTOGRAMS]
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            callback_seconds.observe(elapsed, callback=func.__name__)
+            if in_request:
+                flask.g.callback_seconds = flask.g.get("callback_seconds", 0.0) + elapsed
+            else:
+                _spool_observations(before)
+    return wrapper
+
+
+def _in_server_request():
+    # A forked job process inherits the request context, but not the pid
+    return flask.has_request_context() and flask.g.get("request_pid", os.getpid()) == os.getpid()
+
+
+def _spool_observations(before):
+    """Write the observations made since the before snapshots to METRICS_SPOOL_DIR."""
+    delta = {histogram.name: histogram.since(snapshot) for histogram, snapshot in zip(HISTOGRAMS, before)}
+    try:
+        os.makedirs(METRICS_SPOOL_DIR, exist_ok=True)
+        path = os.path.join(METRICS_SPOOL_DIR, uuid.uuid4().hex + ".json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(delta, file)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass  # metrics must never fail a callback
+
+
+def collect_spooled():
+    """Merge observations spooled by job processes into this process's histograms."""
+    try:
+        names = os.listdir(METRICS_SPOOL_DIR)
+    except FileNotFoundError:
+        return
+    by_name = {histogram.name: histogram for histogram in HISTOGRAMS}
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(METRICS_SPOOL_DIR, name)
+        claimed = f"{path}.{os.getpid()}"
+        try:
+            # Renaming claims the file, so only one server process counts it
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            continue
+        try:
+            with open(claimed) as file:
+                delta = json.load(file)
+        except (OSError, ValueError):
+            delta = {}
+        finally:
+            os.remove(claimed)
+        for histogram_name, series in delta.items():
+            if histogram_name in by_name:
+                by_name[histogram_name].merge(series)
+
+
+@contextmanager
+def time_stage(stage):
+    """Record the wall time of a processing stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - started, stage=stage)
+
+
+def render_metrics():
+    """Render all metrics in the Prometheus text exposition format."""
+    collect_spooled()
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+
+    cache_stats = {name: cache.stats() for name, cache in _caches.items()}
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("bytes", "gauge")):
+        name = f"emg_cache_{field}_total" if kind == "counter" else f"emg_cache_{field}"
+        lines.append(f"# HELP {name} Cache {field} per cache.")
+        lines.append(f"# TYPE {name} {kind}")
+        for cache_name, stats in sorted(cache_stats.items()):
+            if field not in stats:
+                continue  # e.g. diskcache-backed caches do not count evictions
+            lines.append(f"{name}{_format_labels((('cache', cache_name),))} {stats[field]}")
+    return "\n".join(lines) + "\n"
+
+
+def register_routes(server):
+    """Time Dash callback requests and serve /metrics on the Flask server."""
+    @server.before_request
+    def start_request_timer():
+        flask.g.request_started = time.perf_counter()
+        flask.g.request_pid = os.getpid()
+
+    @server.after_request
+    def record_response(response):
+        if (flask.request.path.endswith("/_dash-update-component") and response.status_code == 200
+                and not response.direct_passthrough):
+            body = flask.request.get_json(silent=True) or {}
+            output = body.get("output", "unknown")
+            payload_bytes.observe(response.calculate_content_length() or 0, output=output)
+            if "callback_seconds" in flask.g:
+                elapsed = time.perf_counter() - flask.g.request_started
+                serialization_seconds.observe(max(elapsed - flask.g.callback_seconds, 0.0), output=output)
+        return response
+
+    @server.route("/metrics")
+    def metrics():
+        return flask.Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -1,26 +1,46 @@
 import dash
 from dash import dcc, html, Input, Output, State
 import plotly.graph_objects as go
-import pickle
 import numpy as np
-import base64
-import io
-
-from src.processing.butterworth_filter import process_with_butterworth
-from src.processing.notch_filter import process_with_notch
-from src.processing.rectification import process_with_rectification
-from src.processing.smoothing import apply_smoothing
-from src.processing.normalize import apply_normalization
-from src.processing.feature_extraction import sliding_window_features
+import json
+
+from src.processing.pipeline import PIPELINE_DISK_CACHE_BYTES, PIPELINE_DISK_CACHE_DIR, EMGPipeline
 from src.processing.threshold import get_threshold
-from src.processing.grasp_detection import get_myocontrol_grasp
-from scipy.interpolate import interp1d
+from src.processing.grasp_detection import detect_grasp_from_threshold, get_myocontrol_grasp
+from src.processing.downsampling import downsample_trace
+from src.processing.alignment import align_to_windows, window_center_times
+from src.components.chunked_upload import chunked_upload, register_chunked_upload
+from src.metrics import register_cache, timed_callback
+from src.storage.cache import DiskArrayCache
+from src.storage.loader import file_fingerprint, load_recording
+from src.storage.pyramid import ensure_pyramid, pyramid_trace
+from src.storage.spool import upload_spool
+from src.storage.upload_store import UPLOAD_PREFIX, upload_store
 
 # page routing
 dash.register_page(__name__, path="/emg")
 
-# Global cache for uploaded files
-uploaded_data_cache = {}
+# EMG sampling rate used for the time axes
+EMG_FS = 2000
+
+# Sliding window used for feature extraction (samples)
+FEATURE_FRAME = 200
+FEATURE_STEP = 50
+
+# Stage outputs are cached per dataset, channel and upstream parameters
+# Stages computed by the background callbacks reach the other callbacks through the disk cache
+pipeline = EMGPipeline(disk_cache=DiskArrayCache(PIPELINE_DISK_CACHE_DIR, PIPELINE_DISK_CACHE_BYTES))
+register_cache("pipeline", pipeline.cache)
+register_cache("pipeline_disk", pipeline.disk_cache)
+
+# Index of each overlay trace in the feature figure
+OVERLAY_TRACES = {'threshold': 1, 'grasp_threshold': 2, 'grasp_myocontrol': 3}
+
+
+def progress_bar_style(visible):
+    """Progress bars of background callbacks are only shown while the job runs."""
+    return {'width': '100%', 'height': '8px', 'visibility': 'visible' if visible else 'hidden'}
+
 
 # Layout for EMG Data Analysis Page
 layout = html.Div(
@@ -47,16 +67,11 @@ layout = html.Div(
                     style={'width': '15%', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px'},
                     children=[
                         html.Label("Upload .pkl File:", style={'fontWeight': 'bold'}),
-                        dcc.Upload(
-                            id='upload-data',
-                            children=html.Div(['Drag and Drop or ', html.A('Select File')]),
-                            style={
-                                'width': '100%', 'height': '60px', 'lineHeight': '60px',
-                                'borderWidth': '1px', 'borderStyle': 'dashed',
-                                'borderRadius': '5px', 'textAlign': 'center', 'marginBottom': '20px'
-                            },
-                            multiple=False
-                        ),
+                        chunked_upload('upload-data', 'Select File', style={
+                            'width': '100%', 'height': '60px',
+                            'borderWidth': '1px', 'borderStyle': 'dashed',
+                            'borderRadius': '5px', 'textAlign': 'center', 'backgroundColor': 'transparent'
+                        }),
                         html.Label("Select Data:", style={'fontWeight': 'bold'}),
                         dcc.Dropdown(
                             id='data-dropdown',
@@ -118,6 +133,13 @@ layout = html.Div(
                                 {'label': 'Zero Crossing', 'value': 'Zero Crossing'},
                                 {'label': 'Willison Amplitude (WAMP)', 'value': 'WAMP'},
                                 {'label': 'Mean Power (MYOP)', 'value': 'MYOP'},
+                                {'label': 'Mean Frequency (MNF)', 'value': 'MNF'},
+                                {'label': 'Median Frequency (MDF)', 'value': 'MDF'},
+                                {'label': 'Peak Frequency (PKF)', 'value': 'PKF'},
+                                {'label': 'Spectral Entropy', 'value': 'Spectral Entropy'},
+                                {'label': 'Band Power 20-50 Hz', 'value': 'Band Power Low'},
+                                {'label': 'Band Power 50-150 Hz', 'value': 'Band Power Mid'},
+                                {'label': 'Band Power 150-450 Hz', 'value': 'Band Power High'},
                             ],
                             placeholder="Select Feature",
                             style={'margin-bottom': '10px'}
@@ -159,8 +181,12 @@ layout = html.Div(
                     style={'width': '80%', 'padding': '10px', 'backgroundColor': '#ffffff', 'borderRadius': '10px'},
                     children=[
                         dcc.Graph(id='raw-signal-plot', style={'height': '350px'}),
+                        html.Progress(id='processed-progress', value='0', max='1', style=progress_bar_style(False)),
                         dcc.Graph(id='processed-signal-plot', style={'height': '350px'}),
-                        dcc.Graph(id='features-plot', style={'height': '350px'})
+                        html.Progress(id='features-progress', value='0', max='1', style=progress_bar_style(False)),
+                        dcc.Graph(id='features-plot', style={'height': '350px'}),
+                        # Identifies the feature series currently shown, for the overlay callback
+                        dcc.Store(id='feature-key')
                     ]
                 )
             ]
@@ -168,27 +194,29 @@ layout = html.Div(
     ]
 )
 
-# Upload file and update dropdown
+# Upload file and update dropdown; the file itself was streamed to the spool
+register_chunked_upload('upload-data', '.pkl')
+
+
 @dash.callback(
     Output('data-dropdown', 'options'),
     Output('data-dropdown', 'value'),
-    Input('upload-data', 'contents'),
-    State('upload-data', 'filename'),
-    State('data-dropdown', 'options')
+    Input('upload-data-handle', 'data'),
+    State('data-dropdown', 'options'),
+    State('session-id', 'data')
 )
-def handle_file_upload(contents, filename, existing_options):
-    if contents is None:
+def handle_file_upload(handle, existing_options, session_id):
+    file_path = handle and upload_spool.path(session_id, handle['upload_id'])
+    if not file_path:
         raise dash.exceptions.PreventUpdate
 
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
+    filename = handle['filename']
     try:
-        buffer = io.BytesIO(decoded)
-        data = pickle.load(buffer)
-        uploaded_data_cache[filename] = data
-        new_option = {'label': f'Uploaded: {filename}', 'value': filename}
-        updated_options = existing_options + [new_option]
-        return updated_options, filename
+        digest = upload_store.put(session_id, file_path)
+        value = UPLOAD_PREFIX + digest
+        new_option = {'label': f'Uploaded: {filename}', 'value': value}
+        updated_options = [option for option in existing_options if option['value'] != value] + [new_option]
+        return updated_options, value
     except Exception as e:
         print("Failed to load file:", e)
         raise dash.exceptions.PreventUpdate
@@ -196,147 +224,351 @@ def handle_file_upload(contents, filename, existing_options):
 # Update channel options based on selected data
 @dash.callback(
     Output('channel-dropdown', 'options'),
-    Input('data-dropdown', 'value')
+    Input('data-dropdown', 'value'),
+    State('session-id', 'data')
 )
-def update_channel_options(data_path):
-    data = load_data(data_path)
+def update_channel_options(data_path, session_id):
+    data = load_data(data_path, session_id)
+    if data is None:
+        return []
     return [{'label': f'Channel {i + 1}', 'value': i} for i in range(data['emg'].shape[0])]
 
-# Plot all graphs
+# Raw plot only depends on the dataset and channel
 @dash.callback(
     Output('raw-signal-plot', 'figure'),
+    Input('data-dropdown', 'value'),
+    Input('channel-dropdown', 'value'),
+    State('session-id', 'data')
+)
+@timed_callback
+def update_raw_plot(data_path, channel_idx, session_id):
+    data = load_data(data_path, session_id)
+    if data is None or channel_idx is None:
+        return go.Figure()
+
+    # Traces are downsampled server-side; zooming re-sends the visible range
+    time_raw, raw_values = raw_trace(data_path, session_id, data, channel_idx)
+
+    raw_fig = go.Figure()
+    raw_fig.add_trace(go.Scatter(x=time_raw, y=raw_values, mode='lines', name="Raw", line=dict(color='red')))
+    raw_fig.update_layout(uirevision=f"{data_path}:{channel_idx}", title="Raw EMG Signal", plot_bgcolor='#ffffff', paper_bgcolor='#001f3f', font={'color': 'white'}, xaxis={'title': 'Time (s)', 'gridcolor': '#003366', 'color': 'white'}, yaxis={'title': 'Amplitude', 'gridcolor': '#003366', 'color': 'white'})
+    return raw_fig
+
+
+# Processed plot: filters, smoothing and normalization.
+# Runs as a background job; a new trigger cancels the job still running.
+@dash.callback(
     Output('processed-signal-plot', 'figure'),
+    Input('data-dropdown', 'value'),
+    Input('channel-dropdown', 'value'),
+    Input('filters-checklist', 'value'),
+    Input('smoothing-method', 'value'),
+    Input('normalize-radio', 'value'),
+    State('session-id', 'data'),
+    background=True,
+    progress=[Output('processed-progress', 'value'), Output('processed-progress', 'max')],
+    running=[(Output('processed-progress', 'style'), progress_bar_style(True), progress_bar_style(False))]
+)
+@timed_callback
+def update_processed_plot(set_progress, data_path, channel_idx, filters, smoothing_method, normalize_option, session_id):
+    data = load_data(data_path, session_id)
+    if data is None or channel_idx is None:
+        return go.Figure()
+
+    params = pipeline_params(filters, smoothing_method, normalize_option)
+    signal = process_signal(data_path, session_id, data, channel_idx, params, progress_reporter(set_progress))
+    time_processed, processed_values = downsample_trace(signal, EMG_FS)
+
+    processed_fig = go.Figure()
+    processed_fig.add_trace(go.Scatter(x=time_processed, y=processed_values, mode='lines', name="Processed", line=dict(color='green')))
+    processed_fig.update_layout(uirevision=f"{data_path}:{channel_idx}", title="Processed EMG Signal", plot_bgcolor='#ffffff', paper_bgcolor='#001f3f', font={'color': 'white'}, xaxis={'title': 'Time (s)', 'gridcolor': '#003366', 'color': 'white'}, yaxis={'title': 'Amplitude', 'gridcolor': '#003366', 'color': 'white'})
+    return processed_fig
+
+
+# Feature plot (background job); overlays are patched in by update_feature_overlays
+@dash.callback(
     Output('features-plot', 'figure'),
+    Output('feature-key', 'data'),
     Input('data-dropdown', 'value'),
     Input('channel-dropdown', 'value'),
     Input('filters-checklist', 'value'),
     Input('smoothing-method', 'value'),
     Input('normalize-radio', 'value'),
     Input('feature-extraction-dropdown', 'value'),
-    Input('overlay-checklist', 'value'),
-    Input('myocontrol-column-dropdown', 'value'),
+    State('session-id', 'data'),
+    background=True,
+    progress=[Output('features-progress', 'value'), Output('features-progress', 'max')],
+    running=[(Output('features-progress', 'style'), progress_bar_style(True), progress_bar_style(False))]
+)
+@timed_callback
+def update_features_plot(set_progress, data_path, channel_idx, filters, smoothing_method, normalize_option, feature_method, session_id):
+    data = load_data(data_path, session_id)
+    if data is None or channel_idx is None or not feature_method:
+        return go.Figure(), None
+
+    y_vals = feature_values(data_path, session_id, data, channel_idx, filters, smoothing_method, normalize_option, feature_method,
+                            progress_reporter(set_progress))
+    x_axis = window_center_times(len(y_vals), FEATURE_FRAME, FEATURE_STEP, EMG_FS)
+
+    feature_fig = go.Figure()
+    feature_fig.add_trace(go.Scatter(x=x_axis, y=y_vals, mode='lines', name=feature_method, line=dict(color='blue')))
+    # Empty overlay traces at fixed indices (see OVERLAY_TRACES)
+    feature_fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Threshold', line=dict(color='red', dash='dash'), visible=False))
+    feature_fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Grasp (threshold)', line=dict(color='yellow'), fill='tozeroy', opacity=0.2, visible=False))
+    feature_fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Grasp (myocontrol)', line=dict(color='#ffab91', dash='dot'), fill='tozeroy', opacity=0.3, visible=False))
+
+    feature_fig.update_layout(
+        title=f"Feature: {feature_method}",
+        plot_bgcolor='#ffffff',
+        paper_bgcolor='#001f3f',
+        font={'color': 'white'},
+        xaxis={
+            'title': 'Time (s)',
+            'gridcolor': '#003366',
+            'color': 'white'
+        },
+        yaxis={
+            'title': 'Value',
+            'gridcolor': '#003366',
+            'color': 'white'
+        },
+        legend=dict(
+            x=0.01,
+            y=0.99,
+            bgcolor='rgba(255, 255, 255, 0.7)',
+            bordercolor='black',
+            borderwidth=1,
+            font=dict(
+                color='black',
+                size=12
+            ),
+            orientation="v"
+        )
+    )
+
+    feature_key = [data_path, channel_idx, filters, smoothing_method, normalize_option, feature_method]
+    return feature_fig, feature_key
+
+
+# Threshold and grasp overlays are computed once per feature series and sent
+# as partial updates of the feature plot; overlay-checklist only sets their
+# initial visibility, toggling is done in the browser (see below)
+@dash.callback(
+    Output('features-plot', 'figure', allow_duplicate=True),
+    Input('feature-key', 'data'),
     Input('threshold-method-dropdown', 'value'),
+    Input('myocontrol-column-dropdown', 'value'),
+    State('overlay-checklist', 'value'),
+    State('session-id', 'data'),
+    prevent_initial_call=True
+)
+@timed_callback
+def update_feature_overlays(feature_key, threshold_method, myocontrol_col, overlays, session_id):
+    if not feature_key:
+        raise dash.exceptions.PreventUpdate
+    data_path, channel_idx, filters, smoothing_method, normalize_option, feature_method = feature_key
+    data = load_data(data_path, session_id)
+    if data is None:
+        raise dash.exceptions.PreventUpdate
+
+    y_vals = feature_values(data_path, session_id, data, channel_idx, filters, smoothing_method, normalize_option, feature_method)
+    x_axis = window_center_times(len(y_vals), FEATURE_FRAME, FEATURE_STEP, EMG_FS)
+
+    threshold_val = get_threshold(feature_method, y_vals, method=threshold_method)
+    # Feature signal is sampled at fs_feature = fs / step
+    fs_feature = EMG_FS / FEATURE_STEP
+    overlay_data = {
+        'threshold': np.full(len(x_axis), threshold_val),
+        'grasp_threshold': detect_grasp_from_threshold(y_vals, threshold_val, fs_feature),
+    }
+
+    if 'myocontrol' in data and myocontrol_col is not None:
+        grasp_mask = get_myocontrol_grasp(data['myocontrol'], myocontrol_col)
+        myocontrol_fs = myocontrol_rate(data)
+        overlay_data['grasp_myocontrol'] = align_to_windows(grasp_mask, len(y_vals), FEATURE_FRAME, FEATURE_STEP, EMG_FS, myocontrol_fs)
+
+    patched = dash.Patch()
+    for name, index in OVERLAY_TRACES.items():
+        if name in overlay_data:
+            patched['data'][index]['x'] = x_axis
+            patched['data'][index]['y'] = overlay_data[name]
+        else:
+            patched['data'][index]['x'] = []
+            patched['data'][index]['y'] = []
+        patched['data'][index]['visible'] = name in overlays
+    return patched
 
+
+# Showing or hiding overlays only flips the visibility of traces already in the browser
+dash.clientside_callback(
+    """
+    function(overlays, figure) {
+        const traces = %s;
+        if (!figure || !figure.data || figure.data.length <= Math.max(...Object.values(traces))) {
+            return window.dash_clientside.no_update;
+        }
+        const data = figure.data.slice();
+        for (const [name, index] of Object.entries(traces)) {
+            data[index] = Object.assign({}, data[index], {visible: overlays.includes(name)});
+        }
+        return Object.assign({}, figure, {data: data});
+    }
+    """ % json.dumps(OVERLAY_TRACES),
+    Output('features-plot', 'figure', allow_duplicate=True),
+    Input('overlay-checklist', 'value'),
+    State('features-plot', 'figure'),
+    prevent_initial_call=True
 )
-def update_plots(data_path, channel_idx, filters, smoothing_method, normalize_option, feature_method, overlays, myocontrol_col, threshold_method):
-    if data_path and channel_idx is not None:
-        data = load_data(data_path)
-        raw_signal = data['emg'][channel_idx]
-        signal = raw_signal.copy()
-
-        if 'butterworth' in filters:
-            signal = process_with_butterworth([signal], 1000, 'low', 450)[0]
-        if 'notch' in filters:
-            signal = process_with_notch([signal], 1000, 50)[0]
-        if 'rectify' in filters:
-            signal = process_with_rectification([signal])[0]
-
-        if smoothing_method != 'none':
-            signal = apply_smoothing(signal, method=smoothing_method)
-
-        if normalize_option == 'yes':
-            signal = apply_normalization(signal)
-
-        fs = 2000
-
-        time_raw = np.arange(len(raw_signal)) / fs
-        time_processed = np.arange(len(signal)) / fs
-
-
-        # Raw EMG plot
-        raw_fig = go.Figure()
-        raw_fig.add_trace(go.Scatter(x=time_raw, y=raw_signal, mode='lines', name="Raw", line=dict(color='red')))
-        raw_fig.update_layout(title="Raw EMG Signal", plot_bgcolor='#ffffff', paper_bgcolor='#001f3f', font={'color': 'white'}, xaxis={'title': 'Time (s)', 'gridcolor': '#003366', 'color': 'white'}, yaxis={'title': 'Amplitude', 'gridcolor': '#003366', 'color': 'white'})
-
-        # Processed EMG plot
-        processed_fig = go.Figure()
-        processed_fig.add_trace(go.Scatter(x=time_processed, y=signal, mode='lines', name="Processed", line=dict(color='green')))
-        processed_fig.update_layout(title="Processed EMG Signal", plot_bgcolor='#ffffff', paper_bgcolor='#001f3f', font={'color': 'white'}, xaxis={'title': 'Time (s)', 'gridcolor': '#003366', 'color': 'white'}, yaxis={'title': 'Amplitude', 'gridcolor': '#003366', 'color': 'white'})
-
-        # Feature extraction
-        feature_fig = go.Figure()
-        if feature_method:
-            feature_values = sliding_window_features(signal, frame=200, step=50, selected_features=[feature_method])
-            y_vals = feature_values[feature_method]
-            x_axis = np.arange(len(y_vals)) * (50 / fs)
-            feature_fig.add_trace(go.Scatter(x=x_axis, y=y_vals, mode='lines', name=feature_method, line=dict(color='blue')))
-
-            if 'threshold' in overlays:
-                threshold_val = get_threshold(feature_method, y_vals, method=threshold_method)
-                feature_fig.add_trace(go.Scatter(x=x_axis, y=[threshold_val]*len(x_axis), mode='lines', name='Threshold', line=dict(color='red', dash='dash')))
-
-            if 'grasp_threshold' in overlays:
-                threshold_val = get_threshold(feature_method, y_vals, method=threshold_method)
-                grasp_mask = (np.array(y_vals) > threshold_val).astype(int)
-                def enforce_min_duration(mask, fs, min_duration_sec=0.3):
-                    min_samples = int(min_duration_sec * fs)
-                    filtered = np.zeros_like(mask)
-                    in_segment = False
-                    start = 0
-                    for i, val in enumerate(mask):
-                        if val and not in_segment:
-                            start = i
-                            in_segment = True
-                        elif not val and in_segment:
-                            if i - start >= min_samples:
-                                filtered[start:i] = 1
-                            in_segment = False
-
-                        # If ended with a grasp
-                    if in_segment and len(mask) - start >= min_samples:
-                        filtered[start:] = 1
-
-                    return filtered
-
-                    # Feature signal is sampled at fs_feature = fs / step
-                fs_feature = fs / 50
-                grasp_mask = enforce_min_duration(grasp_mask, fs=fs_feature)
-                feature_fig.add_trace(go.Scatter(x=x_axis, y=grasp_mask, mode='lines', name='Grasp (threshold)', line=dict(color='yellow'), fill='tozeroy', opacity=0.2))
-
-            if 'grasp_myocontrol' in overlays and 'myocontrol' in data and myocontrol_col is not None:
-                grasp_mask = get_myocontrol_grasp(data['myocontrol'], myocontrol_col)
-                if len(grasp_mask) != len(x_axis):
-
-                    interp = interp1d(np.linspace(0, 1, len(grasp_mask)), grasp_mask, kind='nearest')
-                    4
-                    grasp_mask = interp(np.linspace(0, 1, len(x_axis)))
-                feature_fig.add_trace(go.Scatter(x=x_axis, y=np.where(grasp_mask > 0.5, 1, 0), mode='lines', name='Grasp (myocontrol)', line=dict(color='#ffab91', dash='dot'), fill='tozeroy', opacity=0.3))
-
-            feature_fig.update_layout(
-                title=f"Feature: {feature_method}",
-                plot_bgcolor='#ffffff',
-                paper_bgcolor='#001f3f',
-                font={'color': 'white'},
-                xaxis={
-                    'title': 'Time (s)',
-                    'gridcolor': '#003366',
-                    'color': 'white'
-                },
-                yaxis={
-                    'title': 'Value',
-                    'gridcolor': '#003366',
-                    'color': 'white'
-                },
-                legend=dict(
-                    x=0.01,
-                    y=0.99,
-                    bgcolor='rgba(255, 255, 255, 0.7)',
-                    bordercolor='black',
-                    borderwidth=1,
-                    font=dict(
-                        color='black',
-                        size=12
-                    ),
-                    orientation="v"
-                )
-            )
 
-        return raw_fig, processed_fig, feature_fig
+# Re-send the visible range at full resolution when the raw plot is zoomed
+@dash.callback(
+    Output('raw-signal-plot', 'figure', allow_duplicate=True),
+    Input('raw-signal-plot', 'relayoutData'),
+    State('data-dropdown', 'value'),
+    State('channel-dropdown', 'value'),
+    State('session-id', 'data'),
+    prevent_initial_call=True
+)
+@timed_callback
+def zoom_raw_plot(relayout_data, data_path, channel_idx, session_id):
+    x_range = xrange_from_relayout(relayout_data)
+    data = load_data(data_path, session_id)
+    if data is None or channel_idx is None:
+        raise dash.exceptions.PreventUpdate
+    return patch_trace(*raw_trace(data_path, session_id, data, channel_idx, x_range))
+
+
+# Same for the processed plot; the signal is re-derived from the current settings
+@dash.callback(
+    Output('processed-signal-plot', 'figure', allow_duplicate=True),
+    Input('processed-signal-plot', 'relayoutData'),
+    State('data-dropdown', 'value'),
+    State('channel-dropdown', 'value'),
+    State('filters-checklist', 'value'),
+    State('smoothing-method', 'value'),
+    State('normalize-radio', 'value'),
+    State('session-id', 'data'),
+    prevent_initial_call=True
+)
+@timed_callback
+def zoom_processed_plot(relayout_data, data_path, channel_idx, filters, smoothing_method, normalize_option, session_id):
+    x_range = xrange_from_relayout(relayout_data)
+    data = load_data(data_path, session_id)
+    if data is None or channel_idx is None:
+        raise dash.exceptions.PreventUpdate
+    params = pipeline_params(filters, smoothing_method, normalize_option)
+    signal = process_signal(data_path, session_id, data, channel_idx, params)
+    return patch_trace(*downsample_trace(signal, EMG_FS, x_range))
+
+
+def xrange_from_relayout(relayout_data):
+    """
+    Extract the visible x range from a relayoutData event.
+
+    Returns None when the axis was reset to autorange; raises PreventUpdate
+    for events that do not touch the x axis (y-only zoom, drag mode, ...).
+    """
+    if not relayout_data:
+        raise dash.exceptions.PreventUpdate
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    if relayout_data.get('xaxis.autorange') or relayout_data.get('autosize'):
+        return None
+    raise dash.exceptions.PreventUpdate
+
+
+def patch_trace(time, values):
+    """Replace the data of trace 0 with the downsampled visible range."""
+    patched = dash.Patch()
+    patched['data'][0]['x'] = time
+    patched['data'][0]['y'] = values
+    return patched
+
+
+def raw_trace(data_path, session_id, data, channel_idx, x_range=None):
+    """
+    Raw channel for the visible x_range, served from the recording's min/max pyramid.
+
+    If the pyramid cannot be written (e.g. a read-only data directory), the
+    channel is downsampled directly instead.
+    """
+    file_path = recording_path(data_path, session_id)
+    if file_path is None:
+        return downsample_trace(data['emg'][channel_idx], EMG_FS, x_range)
+    try:
+        pyramid = ensure_pyramid(file_path, data['emg'])
+    except OSError:
+        return downsample_trace(data['emg'][channel_idx], EMG_FS, x_range)
+    return pyramid_trace(pyramid, data['emg'][channel_idx], channel_idx, EMG_FS, x_range)
+
+
+def pipeline_params(filters, smoothing_method, normalize_option):
+    """Translate the sidebar controls into (stage, param) pairs for the pipeline."""
+    return (
+        ("butterworth", (1000, 'low', 450) if 'butterworth' in filters else None),
+        ("notch", (1000, 50) if 'notch' in filters else None),
+        ("rectify", 'rectify' in filters),
+        ("smoothing", smoothing_method),
+        ("normalize", normalize_option == 'yes'),
+    )
+
+
+def process_signal(data_path, session_id, data, channel_idx, params, progress=None):
+    """Run the cached pipeline for one channel of the selected dataset."""
+    return pipeline.run(
+        dataset_fingerprint(data_path),
+        channel_idx,
+        lambda: data['emg'][channel_idx],
+        params,
+        progress=progress,
+    )
+
+
+def feature_values(data_path, session_id, data, channel_idx, filters, smoothing_method, normalize_option, feature_method, progress=None):
+    """Sliding-window feature series of the processed channel (cached by the pipeline)."""
+    params = pipeline_params(filters, smoothing_method, normalize_option)
+    params = params + (("features", (feature_method, FEATURE_FRAME, FEATURE_STEP, EMG_FS)),)
+    return process_signal(data_path, session_id, data, channel_idx, params, progress)
+
+
+def progress_reporter(set_progress):
+    """Adapt a background callback's set_progress to the pipeline's progress(done, total)."""
+    return lambda done, total: set_progress((str(done), str(total)))
+
+
+
+def myocontrol_rate(data):
+    """
+    Sampling rate of the myocontrol stream.
+
+    Recordings may store it as 'myocontrol_fs'; otherwise it is derived from
+    the EMG rate, assuming both streams span the same session.
+    """
+    if data.get('myocontrol_fs'):
+        return float(data['myocontrol_fs'])
+    return len(data['myocontrol']) * EMG_FS / data['emg'].shape[1]
+
+
+def dataset_fingerprint(data_path):
+    """Uploads are identified by their content hash, files by path, mtime and size."""
+    if data_path.startswith(UPLOAD_PREFIX):
+        return data_path
+    return file_fingerprint(data_path)
+
+
+def recording_path(data_path, session_id):
+    """File backing the selected dataset (the spooled copy for uploads), or None."""
+    if data_path.startswith(UPLOAD_PREFIX):
+        return upload_store.path(session_id, data_path[len(UPLOAD_PREFIX):])
+    return data_path
 
-    return go.Figure(), go.Figure(), go.Figure()
 
-def load_data(file_path):
-    if file_path in uploaded_data_cache:
-        return uploaded_data_cache[file_path]
-    with open(file_path, 'rb') as file:
-        return pickle.load(file)
+def load_data(file_path, session_id=None):
+    """Load a recording by path, or an upload of this session (None once it has expired)."""
+    if not file_path:
+        return None
+    if file_path.startswith(UPLOAD_PREFIX):
+        return upload_store.get(session_id, file_path[len(UPLOAD_PREFIX):])
+    return load_recording(file_path)
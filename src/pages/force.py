@@ -1,163 +1,191 @@
 import dash
 from dash import dcc, html, Input, Output, State, callback
-import base64
-import io
-import pandas as pd
 import plotly.graph_objs as go
 import os
+import numpy as np
 
+from src.components.chunked_upload import chunked_upload, register_chunked_upload
+from src.metrics import register_cache, timed_callback
+from src.processing.segments import run_length_encode
 from src.processing.smoothing import apply_smoothing
 from src.processing.comparisonforce import generate_force_comparison_figure
+from src.storage.cache import LRUCache
+from src.storage.loader import file_fingerprint
+from src.storage.spool import upload_spool
 
 dash.register_page(__name__, path="/force")
 
-def get_base64_image(image_filename):
-    image_path = os.path.join("assets", image_filename)
-    with open(image_path, "rb") as f:
-        encoded_image = base64.b64encode(f.read()).decode()
-    return f"data:image/png;base64,{encoded_image}"
-
-layout = html.Div(
-    style={'backgroundColor': '#001f3f', 'padding': '20px'},
-    children=[
-        html.Div([
-            dcc.Link(html.Button("🏠", style={
-                "fontSize": "30px",
-                "backgroundColor": "transparent",
-                "color": "white",
-                "padding": "8px 16px",
-                "border": "2px solid white",
-                "borderRadius": "10px",
-                "cursor": "pointer",
-                "marginBottom": "10px"
-            }), href="/")
-        ]),
-        html.H1("Force Data Analysis", style={'textAlign': 'center', 'color': '#f2f3f5'}),
-
-        html.Div(style={'display': 'flex'}, children=[
-
-            # LEFT CONTROLS
-            html.Div(
-                style={
-                    'width': '15%',
-                    'padding': '20px',
-                    'backgroundColor': '#ffffff',
-                    'borderRadius': '10px'
-                },
-                children=[
-                    html.Label("Upload Force Data (.xlsx)", style={'fontWeight': 'bold'}),
-                    dcc.Upload(
-                        id='upload-force-data',
-                        children=html.Div(['Drag and Drop or ', html.A('Select File')]),
-                        style={
+# Byte budget for parsed force tables (default 64 MiB)
+FORCE_CACHE_BYTES = int(os.environ.get("EMG_FORCE_CACHE_BYTES", 64 * 1024 ** 2))
+
+# Uploaded Excel files are parsed once, not on every control change
+force_table_cache = LRUCache(FORCE_CACHE_BYTES)
+register_cache("force", force_table_cache)
+
+def layout(**kwargs):
+    """Page layout, built per request; the images are fetched by the browser from /assets."""
+    return html.Div(
+        style={'backgroundColor': '#001f3f', 'padding': '20px'},
+        children=[
+            html.Div([
+                dcc.Link(html.Button("🏠", style={
+                    "fontSize": "30px",
+                    "backgroundColor": "transparent",
+                    "color": "white",
+                    "padding": "8px 16px",
+                    "border": "2px solid white",
+                    "borderRadius": "10px",
+                    "cursor": "pointer",
+                    "marginBottom": "10px"
+                }), href="/")
+            ]),
+            html.H1("Force Data Analysis", style={'textAlign': 'center', 'color': '#f2f3f5'}),
+
+            html.Div(style={'display': 'flex'}, children=[
+
+                # LEFT CONTROLS
+                html.Div(
+                    style={
+                        'width': '15%',
+                        'padding': '20px',
+                        'backgroundColor': '#ffffff',
+                        'borderRadius': '10px'
+                    },
+                    children=[
+                        html.Label("Upload Force Data (.xlsx)", style={'fontWeight': 'bold'}),
+                        chunked_upload('upload-force-data', 'Select File', style={
                             'width': '100%',
                             'height': '60px',
-                            'lineHeight': '60px',
                             'borderWidth': '1px',
                             'borderStyle': 'dashed',
                             'borderRadius': '5px',
                             'textAlign': 'center',
-                            'marginBottom': '20px'
-                        },
-                        multiple=False
-                    ),
-                    html.Label("Select Signal to View:", style={'fontWeight': 'bold'}),
-                    dcc.Checklist(
-                        id='force-signal-checklist',
-                        options=[
-                            {'label': 'Actual Flexion', 'value': 'Actual Flexion(N)'},
-                            {'label': 'Actual Extension', 'value': 'Actual Extension(N)'},
-                            {'label': 'Input Value', 'value': 'Input Value'},
-                            {'label': 'MCP (α)', 'value': 'MCP (α)'},
-                            {'label': 'PIP (β)', 'value': 'PIP (β)'},
-                            {'label': 'DIP (γ)', 'value': 'DIP (γ)'}
-                        ],
-                        value=['Actual Flexion(N)'],
-                        style={'marginBottom': '20px'},
-                        labelStyle={'display': 'block'}
-                    ),
-                    html.Label("Select Image to View:", style={'fontWeight': 'bold'}),
-                    dcc.Checklist(
-                        id="image-checklist",
-                        options=[
-                            {"label": "Flexion", "value": "flexion"},
-                            {"label": "Extension", "value": "extension"}
-                        ],
-                        value=[],
-                        labelStyle={"display": "block"},
-                        style={"marginBottom": "20px"}
-                    ),
-                    html.Label("Smoothing Method:", style={'fontWeight': 'bold'}),
-                    dcc.RadioItems(
-                        id='force-smoothing-radio',
-                        options=[
-                            {'label': 'None', 'value': 'none'},
-                            {'label': 'Gaussian', 'value': 'gaussian'}
-                        ],
-                        value='none',
-                        labelStyle={'display': 'block'},
-                        style={'marginBottom': '20px'}
-                    ),
-                    html.Label("Show Input Zones:", style={'fontWeight': 'bold'}),
-                    dcc.RadioItems(
-                        id='zone-highlight-radio',
-                        options=[
-                            {'label': 'None', 'value': 'none'},
-                            {'label': 'Flexion/Extension Zones', 'value': 'zones'}
-                        ],
-                        value='none',
-                        labelStyle={'display': 'block'},
-                        style={'marginBottom': '20px'}
-                    ),
-                ]
-            ),
-            # SPACER
-            html.Div(style={'width': '2%'}),
-            # RIGHT GRAPHS
-
-            html.Div(
-                style={
-                    'width': '78%',
-                    'padding': '0',
-                    'backgroundColor': '#001f3f',
-                    'borderRadius': '10px',
-                    'display': 'flex',
-                    'flexDirection': 'column'
-
-                },
-                children=[
-                dcc.Graph(id='force-graph-raw' ,style={'height': '350px'}),
-                html.Div(id="selected-images-center", style={"display": "flex",
-                                        "justifyContent": "center",
-                                        "alignItems": "center",
-                                        "gap": "20px",
-                                        "marginTop": "20px",
-                                        "marginBottom": "20px"}),
-                dcc.Graph(id='force-graph-smoothed',style={'height': '350px'}),
-                dcc.Graph(id='force-graph-comparison',style={'height': '350px'}),
+                            'backgroundColor': 'transparent'
+                        }),
+                        html.Label("Select Signal to View:", style={'fontWeight': 'bold'}),
+                        dcc.Checklist(
+                            id='force-signal-checklist',
+                            options=[
+                                {'label': 'Actual Flexion', 'value': 'Actual Flexion(N)'},
+                                {'label': 'Actual Extension', 'value': 'Actual Extension(N)'},
+                                {'label': 'Input Value', 'value': 'Input Value'},
+                                {'label': 'MCP (α)', 'value': 'MCP (α)'},
+                                {'label': 'PIP (β)', 'value': 'PIP (β)'},
+                                {'label': 'DIP (γ)', 'value': 'DIP (γ)'}
+                            ],
+                            value=['Actual Flexion(N)'],
+                            style={'marginBottom': '20px'},
+                            labelStyle={'display': 'block'}
+                        ),
+                        html.Label("Select Image to View:", style={'fontWeight': 'bold'}),
+                        dcc.Checklist(
+                            id="image-checklist",
+                            options=[
+                                {"label": "Flexion", "value": "flexion"},
+                                {"label": "Extension", "value": "extension"}
+                            ],
+                            value=[],
+                            labelStyle={"display": "block"},
+                            style={"marginBottom": "20px"}
+                        ),
+                        html.Label("Smoothing Method:", style={'fontWeight': 'bold'}),
+                        dcc.RadioItems(
+                            id='force-smoothing-radio',
+                            options=[
+                                {'label': 'None', 'value': 'none'},
+                                {'label': 'Gaussian', 'value': 'gaussian'}
+                            ],
+                            value='none',
+                            labelStyle={'display': 'block'},
+                            style={'marginBottom': '20px'}
+                        ),
+                        html.Label("Show Input Zones:", style={'fontWeight': 'bold'}),
+                        dcc.RadioItems(
+                            id='zone-highlight-radio',
+                            options=[
+                                {'label': 'None', 'value': 'none'},
+                                {'label': 'Flexion/Extension Zones', 'value': 'zones'}
+                            ],
+                            value='none',
+                            labelStyle={'display': 'block'},
+                            style={'marginBottom': '20px'}
+                        ),
+                    ]
+                ),
+                # SPACER
+                html.Div(style={'width': '2%'}),
+                # RIGHT GRAPHS
+
+                html.Div(
+                    style={
+                        'width': '78%',
+                        'padding': '0',
+                        'backgroundColor': '#001f3f',
+                        'borderRadius': '10px',
+                        'display': 'flex',
+                        'flexDirection': 'column'
+
+                    },
+                    children=[
+                    dcc.Graph(id='force-graph-raw' ,style={'height': '350px'}),
+                    # Both images are linked from the page (cached by the browser); image-checklist only toggles them
+                    html.Div(id="selected-images-center", style={"display": "flex",
+                                            "justifyContent": "center",
+                                            "alignItems": "center",
+                                            "gap": "20px",
+                                            "marginTop": "20px",
+                                            "marginBottom": "20px"},
+                             children=[
+                                 html.Div(id="force-image-flexion", children=[
+                                     html.Img(src=dash.get_asset_url("flexion.png"), style={"height": "250px"}),
+                                     html.P("Flexion", style={"color": "white", "textAlign": "center"})
+                                 ], style={"display": "none", "marginRight": "800px"}),
+                                 html.Div(id="force-image-extension", children=[
+                                     html.Img(src=dash.get_asset_url("extension.png"), style={"height": "250px"}),
+                                     html.P("Extension", style={"color": "white", "textAlign": "center"})
+                                 ], style={"display": "none", "marginRight": "180px"}),
+                             ]),
+                    dcc.Graph(id='force-graph-smoothed',style={'height': '350px'}),
+                    dcc.Graph(id='force-graph-comparison',style={'height': '350px'}),
+                ])
             ])
-        ])
-    ]
-)
+        ]
+    )
+
+def load_force_table(handle, session_id):
+    """Parse the spooled Excel upload of this session (cached), or None."""
+    file_path = handle and upload_spool.path(session_id, handle['upload_id'])
+    if not file_path:
+        return None
+    key = file_fingerprint(file_path)
+    df = force_table_cache.get(key)
+    if df is None:
+        import pandas as pd
+
+        df = pd.read_excel(file_path)
+        force_table_cache.put(key, df)
+    return df
+
+
+register_chunked_upload('upload-force-data', '.xlsx')
+
 
 @callback(
     Output('force-graph-raw', 'figure'),
     Output('force-graph-smoothed', 'figure'),
     Output('force-graph-comparison', 'figure'),
-    Input('upload-force-data', 'contents'),
-    State('upload-force-data', 'filename'),
+    Input('upload-force-data-handle', 'data'),
     Input('force-signal-checklist', 'value'),
     Input('force-smoothing-radio', 'value'),
-    Input('zone-highlight-radio', 'value')
+    Input('zone-highlight-radio', 'value'),
+    State('session-id', 'data')
 )
-
-def update_force_graph(contents, filename, selected_signals, smoothing_method, zone_option):
-    if contents is None or not selected_signals:
+@timed_callback
+def update_force_graph(handle, selected_signals, smoothing_method, zone_option, session_id):
+    df = load_force_table(handle, session_id)
+    if df is None or not selected_signals:
         return go.Figure(), go.Figure(), go.Figure()
 
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    df = pd.read_excel(io.BytesIO(decoded))
     time = df["Time (s)"]
     input_val_raw = df["Input Value"]
     rom_cols = ["MCP (α)", "PIP (β)", "DIP (γ)"]
@@ -215,9 +243,7 @@ def update_force_graph(contents, filename, selected_signals, smoothing_method, z
     # === FLEXION / EXTENSION ZONES ===
     if zone_option == 'zones':
         # Binarize the Input Value signal for zone logic
-        thresholded_input_val = (input_val_raw > 0.5).astype(int)
-        current_val = thresholded_input_val.iloc[0]
-        start_time = time.iloc[0]
+        thresholded_input_val = (input_val_raw > 0.5).astype(int).to_numpy()
 
         # Compute ymax for shaded region height
         force_cols = ['Actual Flexion(N)', 'Actual Extension(N)', 'Input Value']
@@ -228,41 +254,23 @@ def update_force_graph(contents, filename, selected_signals, smoothing_method, z
         else:
             ymax = 1  # fallback default
 
-        for i in range(1, len(thresholded_input_val)):
-            val = thresholded_input_val.iloc[i]
-            if val != current_val:
-                end_time = time.iloc[i]
-                color = "#ffe6e6" if current_val == 1 else "#d6e0ff"
-                fig_smoothed.add_shape(
-                    type="rect",
-                    x0=start_time,
-                    x1=end_time,
-                    y0=0,
-                    y1=ymax,
-                    xref="x",
-                    yref="y",
-                    fillcolor=color,
-                    line=dict(width=0),
-                    layer="below"
-                )
-                current_val = val
-                start_time = end_time
-
-        # Close the last zone
-        end_time = time.iloc[-1]
-        color = "#ffe6e6" if current_val == 1 else "#d6e0ff"
-        fig_smoothed.add_shape(
-            type="rect",
-            x0=start_time,
-            x1=end_time,
-            y0=0,
-            y1=ymax,
-            xref="x",
-            yref="y",
-            fillcolor=color,
-            line=dict(width=0),
-            layer="below"
-        )
+        # One shaded zone per run of equal input state; the last one ends at the last sample
+        starts, lengths, zone_values = run_length_encode(thresholded_input_val)
+        ends = np.append(starts[1:], len(thresholded_input_val) - 1)
+        for start, end, zone_value in zip(starts, ends, zone_values):
+            color = "#ffe6e6" if zone_value == 1 else "#d6e0ff"
+            fig_smoothed.add_shape(
+                type="rect",
+                x0=time.iloc[start],
+                x1=time.iloc[end],
+                y0=0,
+                y1=ymax,
+                xref="x",
+                yref="y",
+                fillcolor=color,
+                line=dict(width=0),
+                layer="below"
+            )
         # for Flexion and Extension zones
         fig_smoothed.add_trace(go.Scatter(
             x=[None], y=[None],
@@ -281,33 +289,15 @@ def update_force_graph(contents, filename, selected_signals, smoothing_method, z
     return fig_raw, fig_smoothed, fig_comparison
 
 
-
-@callback(
-    Output("selected-images-center", "children"),
+# Show or hide the pre-rendered images without a server round trip
+dash.clientside_callback(
+    """
+    function(imageTypes) {
+        const style = (name, marginRight) => ({display: imageTypes.includes(name) ? 'block' : 'none', marginRight: marginRight});
+        return [style('flexion', '800px'), style('extension', '180px')];
+    }
+    """,
+    Output("force-image-flexion", "style"),
+    Output("force-image-extension", "style"),
     Input("image-checklist", "value")
 )
-def display_selected_image(image_types):
-    if not image_types:
-        return None
-
-    images = []
-    for image_type in image_types:
-        if image_type == "flexion":
-            images.append(html.Div([
-                html.Img(src=get_base64_image("flexion.png"), style={"height": "250px"}),
-                html.P("Flexion", style={"color": "white", "textAlign": "center"})
-            ], style={"marginRight": "800px"}))
-
-        elif image_type == "extension":
-            images.append(html.Div([
-                html.Img(src=get_base64_image("extension.png"), style={"height": "250px"}),
-                html.P("Extension", style={"color": "white", "textAlign": "center"})
-            ], style={"marginRight": "180px"}))
-
-    return html.Div(
-        images,
-        style={"display": "flex", "justifyContent": "center", "alignItems": "center", "marginTop": "10px","marginBottom": "10px"}
-    )
-
-
-
@@ -21,6 +21,7 @@ layout = html.Div([
     html.Div([
         dcc.Link(html.Button("ROM ", style=button_style), href="/rom"),
         dcc.Link(html.Button("EMG Data ", style=button_style), href="/emg"),
+        dcc.Link(html.Button("Live EMG ", style=button_style), href="/emg-live"),
         dcc.Link(html.Button("Force Data ", style=button_style), href="/force")
 
     ], style={"display": "flex", "justifyContent": "center", "gap": "2rem"})
@@ -0,0 +1,268 @@
+import dash
+from dash import dcc, html, Input, Output, State, ctx
+import plotly.graph_objects as go
+import numpy as np
+
+from src.processing.streaming import StreamProcessor
+from src.storage.live_source import (
+    FileTailSource, LiveAcquisition, SocketSource, get_acquisition, new_state_dir, start_acquisition, stop_acquisition
+)
+
+# page routing
+dash.register_page(__name__, path="/emg-live")
+
+# Seconds of signal kept server-side per channel and shown in the browser
+LIVE_BUFFER_SECONDS = 60
+LIVE_WINDOW_SECONDS = 10
+
+# Graph refresh period (ms)
+LIVE_REFRESH_MS = 200
+
+# Filters offered in the sidebar
+LIVE_BANDPASS = ('bandpass', (20, 450))
+LIVE_NOTCH_HZ = 50
+
+label_style = {'fontWeight': 'bold'}
+
+layout = html.Div(
+    style={'backgroundColor': '#001f3f', 'padding': '20px'},
+    children=[
+        html.Div([
+            dcc.Link(html.Button("🏠", style={
+                "fontSize": "30px",
+                "backgroundColor": "transparent",
+                "color": "white",
+                "padding": "8px 16px",
+                "border": "2px solid white",
+                "borderRadius": "10px",
+                "cursor": "pointer",
+                "marginBottom": "10px"
+            }), href="/")
+        ]),
+        html.H1("Live EMG", style={'textAlign': 'center', 'color': '#f2f3f5'}),
+        html.Div(
+            style={'display': 'flex', 'justify-content': 'space-between'},
+            children=[
+                # Left Sidebar Controls
+                html.Div(
+                    style={'width': '15%', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px'},
+                    children=[
+                        html.Label("Source:", style=label_style),
+                        dcc.RadioItems(
+                            id='live-source-type',
+                            options=[
+                                {'label': 'TCP', 'value': 'tcp'},
+                                {'label': 'UDP', 'value': 'udp'},
+                                {'label': 'File', 'value': 'file'}
+                            ],
+                            value='tcp',
+                            style={'margin-bottom': '10px'}
+                        ),
+                        html.Label("Address (host:port or file path):", style=label_style),
+                        dcc.Input(id='live-address', type='text', value='127.0.0.1:5555',
+                                  style={'width': '100%', 'margin-bottom': '20px'}),
+                        html.Label("Channels:", style=label_style),
+                        dcc.Input(id='live-n-channels', type='number', value=8, min=1,
+                                  style={'width': '100%', 'margin-bottom': '20px'}),
+                        html.Label("Sampling Rate (Hz):", style=label_style),
+                        dcc.Input(id='live-fs', type='number', value=2000, min=1,
+                                  style={'width': '100%', 'margin-bottom': '20px'}),
+                        html.Label("Apply Filters:", style=label_style),
+                        dcc.Checklist(
+                            id='live-filters-checklist',
+                            options=[
+                                {'label': 'Butterworth Filter (20-450Hz)', 'value': 'butterworth'},
+                                {'label': 'Notch Filter (50Hz)', 'value': 'notch'},
+                                {'label': 'Rectification', 'value': 'rectify'}
+                            ],
+                            value=['butterworth', 'notch'],
+                            style={'margin-bottom': '20px'}
+                        ),
+                        html.Button("Start", id='live-start', n_clicks=0, style={'marginRight': '10px'}),
+                        html.Button("Stop", id='live-stop', n_clicks=0),
+                        html.Div(id='live-status', style={'marginTop': '20px', 'marginBottom': '20px'}),
+                        html.Label("Select Channel:", style=label_style),
+                        dcc.Dropdown(id='live-channel-dropdown', options=[], value=0,
+                                     style={'margin-bottom': '20px'}),
+                        html.Label("Threshold:", style=label_style),
+                        dcc.Dropdown(
+                            id='live-threshold-method',
+                            options=[
+                                {'label': 'None', 'value': 'none'},
+                                {'label': 'Mean + 0.5*STD', 'value': 'mean_std'},
+                                {'label': '85th Percentile', 'value': 'percentile'}
+                            ],
+                            value='none',
+                            clearable=False
+                        ),
+                    ]
+                ),
+                # Right Side Plots
+                html.Div(
+                    style={'width': '80%', 'padding': '10px', 'backgroundColor': '#ffffff', 'borderRadius': '10px'},
+                    children=[
+                        dcc.Graph(id='live-raw-plot', style={'height': '350px'}),
+                        dcc.Graph(id='live-processed-plot', style={'height': '350px'}),
+                    ]
+                )
+            ]
+        ),
+        dcc.Interval(id='live-interval', interval=LIVE_REFRESH_MS, disabled=True),
+        # Absolute stream position of the last sample sent to the graphs
+        dcc.Store(id='live-cursor', data=0),
+    ]
+)
+
+
+def live_figure(title, color, threshold=False):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', line=dict(color=color), showlegend=False))
+    if threshold:
+        # Threshold estimated over the whole stream so far, one point per refresh
+        fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Threshold', line=dict(color='orange', dash='dash')))
+    fig.update_layout(title=title, plot_bgcolor='#ffffff', paper_bgcolor='#001f3f', font={'color': 'white'}, xaxis={'title': 'Time (s)', 'gridcolor': '#003366', 'color': 'white'}, yaxis={'title': 'Amplitude', 'gridcolor': '#003366', 'color': 'white'})
+    return fig
+
+
+# Start or stop the acquisition for this session
+@dash.callback(
+    Output('live-interval', 'disabled'),
+    Output('live-status', 'children'),
+    Output('live-channel-dropdown', 'options'),
+    Input('live-start', 'n_clicks'),
+    Input('live-stop', 'n_clicks'),
+    State('live-source-type', 'value'),
+    State('live-address', 'value'),
+    State('live-n-channels', 'value'),
+    State('live-fs', 'value'),
+    State('live-filters-checklist', 'value'),
+    State('session-id', 'data'),
+    prevent_initial_call=True
+)
+def control_acquisition(start_clicks, stop_clicks, source_type, address, n_channels, fs, filters, session_id):
+    if ctx.triggered_id == 'live-stop':
+        stop_acquisition(session_id)
+        return True, "Stopped", dash.no_update
+
+    error = validate_settings(address, n_channels, fs, filters)
+    if error:
+        return True, error, dash.no_update
+    n_channels = int(n_channels)
+    try:
+        processor = StreamProcessor(
+            fs,
+            butterworth=LIVE_BANDPASS if 'butterworth' in filters else None,
+            notch_freq=LIVE_NOTCH_HZ if 'notch' in filters else None,
+            rectify='rectify' in filters,
+        )
+    except ValueError as e:
+        return True, f"Invalid filter settings: {e}", dash.no_update
+
+    try:
+        if source_type == 'file':
+            source = FileTailSource(address, n_channels)
+        else:
+            source = SocketSource(address, n_channels, protocol=source_type)
+    except (OSError, ValueError) as e:
+        return True, f"Could not open source: {e}", dash.no_update
+
+    acquisition = LiveAcquisition(source, processor, n_channels, capacity=int(LIVE_BUFFER_SECONDS * fs),
+                                  state_dir=new_state_dir(session_id))
+    start_acquisition(session_id, acquisition)
+    options = [{'label': f'Channel {i + 1}', 'value': i} for i in range(n_channels)]
+    return False, "Running", options
+
+
+def validate_settings(address, n_channels, fs, filters):
+    """Return an error message for unusable acquisition settings, or None."""
+    if not address:
+        return "Enter an address (host:port or file path)."
+    if n_channels is None or int(n_channels) != n_channels or n_channels < 1:
+        return "Enter a whole number of channels (1 or more)."
+    if fs is None or fs <= 0:
+        return "Enter a sampling rate above 0 Hz."
+    nyquist = fs / 2
+    if 'butterworth' in (filters or []) and LIVE_BANDPASS[1][1] >= nyquist:
+        return f"The {LIVE_BANDPASS[1][0]}-{LIVE_BANDPASS[1][1]} Hz bandpass needs a sampling rate above {2 * LIVE_BANDPASS[1][1]} Hz."
+    if 'notch' in (filters or []) and LIVE_NOTCH_HZ >= nyquist:
+        return f"The {LIVE_NOTCH_HZ} Hz notch needs a sampling rate above {2 * LIVE_NOTCH_HZ} Hz."
+    return None
+
+
+# A restart with fewer channels must not keep a channel that no longer exists
+@dash.callback(
+    Output('live-channel-dropdown', 'value'),
+    Input('live-channel-dropdown', 'options'),
+    State('live-channel-dropdown', 'value'),
+    prevent_initial_call=True
+)
+def clamp_live_channel(options, channel_idx):
+    if channel_idx is not None and channel_idx < len(options):
+        raise dash.exceptions.PreventUpdate
+    return 0 if options else None
+
+
+# Clear the graphs when the stream (re)starts or another channel is selected
+@dash.callback(
+    Output('live-raw-plot', 'figure'),
+    Output('live-processed-plot', 'figure'),
+    Output('live-cursor', 'data', allow_duplicate=True),
+    Input('live-interval', 'disabled'),
+    Input('live-channel-dropdown', 'value'),
+    Input('live-threshold-method', 'value'),
+    State('session-id', 'data'),
+    prevent_initial_call='initial_duplicate'
+)
+def reset_live_plots(disabled, channel_idx, threshold_method, session_id):
+    acquisition = get_acquisition(session_id)
+    position = acquisition.raw.total if acquisition is not None else 0
+    processed_fig = live_figure("Processed EMG Signal", 'green', threshold=threshold_method != 'none')
+    return live_figure("Raw EMG Signal", 'red'), processed_fig, position
+
+
+# Push only the samples that arrived since the last refresh
+@dash.callback(
+    Output('live-raw-plot', 'extendData'),
+    Output('live-processed-plot', 'extendData'),
+    Output('live-cursor', 'data'),
+    Output('live-status', 'children', allow_duplicate=True),
+    Input('live-interval', 'n_intervals'),
+    State('live-channel-dropdown', 'value'),
+    State('live-cursor', 'data'),
+    State('live-fs', 'value'),
+    State('live-threshold-method', 'value'),
+    State('session-id', 'data'),
+    prevent_initial_call=True
+)
+def stream_live_data(n_intervals, channel_idx, cursor, fs, threshold_method, session_id):
+    acquisition = get_acquisition(session_id)
+    if acquisition is None or channel_idx is None or not fs or fs <= 0:
+        raise dash.exceptions.PreventUpdate
+
+    if channel_idx >= acquisition.raw.n_channels:
+        # Restarted (possibly from another tab) with fewer channels; clamp_live_channel resets the selection
+        raise dash.exceptions.PreventUpdate
+
+    status = f"Running: {acquisition.raw.total / fs:.1f} s received, {acquisition.chunk_latency_ms:.2f} ms/chunk"
+    if acquisition.error:
+        status = f"Stopped: {acquisition.error}"
+
+    start, raw = acquisition.raw.read_since(cursor)
+    _, processed = acquisition.processed.read_since(start)
+    n = min(raw.shape[1], processed.shape[1])
+    if n == 0:
+        return dash.no_update, dash.no_update, dash.no_update, status
+
+    time = (start + np.arange(n)) / fs
+    max_points = int(LIVE_WINDOW_SECONDS * fs)
+    raw_update = (dict(x=[time], y=[raw[channel_idx, :n]]), [0], max_points)
+    processed_update = (dict(x=[time], y=[processed[channel_idx, :n]]), [0], max_points)
+    thresholds = acquisition.thresholds.get(threshold_method)
+    if thresholds:
+        # Keep the threshold line as long as the visible window
+        threshold_points = 2 * int(LIVE_WINDOW_SECONDS * 1000 / LIVE_REFRESH_MS)
+        processed_update = (
+            dict(x=[time, [time[0], time[-1]]], y=[processed[channel_idx, :n], [thresholds[channel_idx]] * 2]),
+            [0, 1], [max_points, threshold_points]
+        )
+    return raw_update, processed_update, start + n, status
@@ -4,10 +4,11 @@ import numpy as np
 import dash
 from dash import dcc, html, Input, Output, State, ctx, dash_table
 import plotly.graph_objs as go
-from PIL import Image
 import os
 from urllib.request import urlopen
 
+from src.metrics import timed_callback
+
 dash.register_page(__name__, path="/rom", name="ROM Analysis")
 
 def get_assets_image_options():
@@ -21,6 +22,16 @@ def angle(a, b, c):
     cos_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
     return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
 
+def open_image(source):
+    """Open an image file (path or file-like object) as RGB. PIL is only imported on first use."""
+    from PIL import Image
+    return Image.open(source).convert("RGB")
+
+def figure_image(fig):
+    """Return the image shown in a figure as a PIL image."""
+    from PIL import Image
+    return Image.fromarray(np.array(fig["data"][0]["z"], dtype=np.uint8))
+
 def blank_fig():
     return go.Figure(go.Image(z=np.ones((250, 250, 3)))).update_layout(
         margin=dict(l=0, r=0, t=0, b=0),
@@ -29,107 +40,110 @@ def blank_fig():
     )
 
 
-layout = html.Div(
-    style={'backgroundColor': '#001f3f', 'padding': '20px'},
-    children=[
-        html.Div([
-            dcc.Link(html.Button("🏠", style={
-                "fontSize": "30px",
-                "backgroundColor": "transparent",
-                "color": "white",
-                "padding": "8px 16px",
-                "border": "2px solid white",
-                "borderRadius": "10px",
-                "cursor": "pointer",
-                "marginBottom": "10px"
-            }), href="/")
-        ]),
-
-        html.H1("Range of Motion Analysis", style={'textAlign': 'center', 'color': '#f2f3f5'}),
-
-        html.Div([
+def layout(**kwargs):
+    """Page layout, built per request so the image list is read when the page is opened."""
+    return html.Div(
+        style={'backgroundColor': '#001f3f', 'padding': '20px'},
+        children=[
             html.Div([
-                html.H4("Flexion Image", style={"color": "white"}),
-                dcc.Upload(
-                    id="upload-flexion",
-                    children=html.Div(['Drag and Drop or ', html.A('Select Flexion File')]),
-                    style={
-                        'width': '100%', 'height': '60px', 'lineHeight': '60px',
-                        'borderWidth': '1px', 'borderStyle': 'dashed',
-                        'borderRadius': '5px', 'textAlign': 'center', 'marginBottom': '10px',
-                        'backgroundColor': '#ffffff', 'color': '#001f3f'
-                    },
-                    multiple=False
-                ),
-                dcc.Dropdown(
-                    id='flexion-dropdown',
-                    options=get_assets_image_options(),
-                    placeholder="Select Flexion Image",
-                    style={'marginBottom': '10px'}
-                ),
-                html.Button("Undo ", id="undo-flexion", n_clicks=0, style={"marginBottom": "5px"}),
-                html.Button("Reset ", id="reset-flexion", n_clicks=0),
-            ], style={"width": "48%", "display": "inline-block", "verticalAlign": "top", "padding": "10px"}),
+                dcc.Link(html.Button("🏠", style={
+                    "fontSize": "30px",
+                    "backgroundColor": "transparent",
+                    "color": "white",
+                    "padding": "8px 16px",
+                    "border": "2px solid white",
+                    "borderRadius": "10px",
+                    "cursor": "pointer",
+                    "marginBottom": "10px"
+                }), href="/")
+            ]),
+
+            html.H1("Range of Motion Analysis", style={'textAlign': 'center', 'color': '#f2f3f5'}),
 
             html.Div([
-                html.H4("Extension Image", style={"color": "white"}),
-                dcc.Upload(
-                    id="upload-extension",
-                    children=html.Div(['Drag and Drop or ', html.A('Select Extension File')]),
-                    style={
-                        'width': '100%', 'height': '60px', 'lineHeight': '60px',
-                        'borderWidth': '1px', 'borderStyle': 'dashed',
-                        'borderRadius': '5px', 'textAlign': 'center', 'marginBottom': '10px',
-                        'backgroundColor': '#ffffff', 'color': '#001f3f'
-                    },
-                    multiple=False
-                ),
-                dcc.Dropdown(
-                    id='extension-dropdown',
-                    options=get_assets_image_options(),
-                    placeholder="Select Extension Image",
-                    style={'marginBottom': '10px'}
-                ),
-                html.Button("Undo ", id="undo-extension", n_clicks=0, style={"marginBottom": "5px"}),
-                html.Button("Reset ", id="reset-extension", n_clicks=0),
-            ], style={"width": "48%", "display": "inline-block", "verticalAlign": "top", "padding": "10px"})
-        ], style={"marginBottom": "30px"}),
-
-        html.Div([
-            html.Div([
-                html.H4("Flexion View", style={"color": "white"}),
-                dcc.Graph(
-                    id="flexion-graph",
-                    figure=blank_fig(),
-                    config={
-                        "modeBarButtonsToRemove": [ "pan", "select", "lasso2d", "zoomIn2d", "zoomOut2d", "autoScale2d", "resetScale2d"],
-                        "modeBarButtonsToAdd": ["zoom2d", "toImage"],
-                        "displaylogo": False,
-                        "displayModeBar": True
-                    },
-                    style={"height": "400px"}
-                ),
-            ], style={"width": "48%", "display": "inline-block"}),
+                html.Div([
+                    html.H4("Flexion Image", style={"color": "white"}),
+                    dcc.Upload(
+                        id="upload-flexion",
+                        children=html.Div(['Drag and Drop or ', html.A('Select Flexion File')]),
+                        style={
+                            'width': '100%', 'height': '60px', 'lineHeight': '60px',
+                            'borderWidth': '1px', 'borderStyle': 'dashed',
+                            'borderRadius': '5px', 'textAlign': 'center', 'marginBottom': '10px',
+                            'backgroundColor': '#ffffff', 'color': '#001f3f'
+                        },
+                        multiple=False
+                    ),
+                    dcc.Dropdown(
+                        id='flexion-dropdown',
+                        options=get_assets_image_options(),
+                        placeholder="Select Flexion Image",
+                        style={'marginBottom': '10px'}
+                    ),
+                    html.Button("Undo ", id="undo-flexion", n_clicks=0, style={"marginBottom": "5px"}),
+                    html.Button("Reset ", id="reset-flexion", n_clicks=0),
+                ], style={"width": "48%", "display": "inline-block", "verticalAlign": "top", "padding": "10px"}),
+
+                html.Div([
+                    html.H4("Extension Image", style={"color": "white"}),
+                    dcc.Upload(
+                        id="upload-extension",
+                        children=html.Div(['Drag and Drop or ', html.A('Select Extension File')]),
+                        style={
+                            'width': '100%', 'height': '60px', 'lineHeight': '60px',
+                            'borderWidth': '1px', 'borderStyle': 'dashed',
+                            'borderRadius': '5px', 'textAlign': 'center', 'marginBottom': '10px',
+                            'backgroundColor': '#ffffff', 'color': '#001f3f'
+                        },
+                        multiple=False
+                    ),
+                    dcc.Dropdown(
+                        id='extension-dropdown',
+                        options=get_assets_image_options(),
+                        placeholder="Select Extension Image",
+                        style={'marginBottom': '10px'}
+                    ),
+                    html.Button("Undo ", id="undo-extension", n_clicks=0, style={"marginBottom": "5px"}),
+                    html.Button("Reset ", id="reset-extension", n_clicks=0),
+                ], style={"width": "48%", "display": "inline-block", "verticalAlign": "top", "padding": "10px"})
+            ], style={"marginBottom": "30px"}),
 
             html.Div([
-                html.H4("Extension View", style={"color": "white"}),
-                dcc.Graph(
-                    id="extension-graph",
-                    figure=blank_fig(),
-                    config={
-                        "modeBarButtonsToRemove": [ "pan", "select", "lasso2d", "zoomIn2d", "zoomOut2d", "autoScale2d", "resetScale2d"],
-                        "modeBarButtonsToAdd": ["zoom2d", "toImage"],
-                        "displaylogo": False,
-                        "displayModeBar": True
-                    },
-                    style={"height": "400px"}
-                ),
-            ], style={"width": "48%", "display": "inline-block", "marginLeft": "4%"})
-        ]),
-
-        html.Div(id="angle-table", style={"marginTop": "30px"})
-    ]
-)
+                html.Div([
+                    html.H4("Flexion View", style={"color": "white"}),
+                    dcc.Graph(
+                        id="flexion-graph",
+                        figure=blank_fig(),
+                        config={
+                            "modeBarButtonsToRemove": [ "pan", "select", "lasso2d", "zoomIn2d", "zoomOut2d", "autoScale2d", "resetScale2d"],
+                            "modeBarButtonsToAdd": ["zoom2d", "toImage"],
+                            "displaylogo": False,
+                            "displayModeBar": True
+                        },
+                        style={"height": "400px"}
+                    ),
+                ], style={"width": "48%", "display": "inline-block"}),
+
+                html.Div([
+                    html.H4("Extension View", style={"color": "white"}),
+                    dcc.Graph(
+                        id="extension-graph",
+                        figure=blank_fig(),
+                        config={
+                            "modeBarButtonsToRemove": [ "pan", "select", "lasso2d", "zoomIn2d", "zoomOut2d", "autoScale2d", "resetScale2d"],
+                            "modeBarButtonsToAdd": ["zoom2d", "toImage"],
+                            "displaylogo": False,
+                            "displayModeBar": True
+                        },
+                        style={"height": "400px"}
+                    ),
+                ], style={"width": "48%", "display": "inline-block", "marginLeft": "4%"})
+            ]),
+
+            html.Div(id="angle-table", style={"marginTop": "30px"})
+        ]
+    )
+
 # Global point storage
 flexion_points = []
 extension_points = []
@@ -231,16 +245,17 @@ def calculate_angles(points):
     Input("flexion-dropdown", "value"),
     prevent_initial_call=True
 )
+@timed_callback
 def update_flexion_image(uploaded_content, dropdown_path):
     flexion_points.clear()
     if uploaded_content:
         content_type, content_string = uploaded_content.split(',')
         decoded = base64.b64decode(content_string)
-        pil_img = Image.open(io.BytesIO(decoded)).convert("RGB")
+        pil_img = open_image(io.BytesIO(decoded))
         return pil_image_to_fig(pil_img, points=[], angles=None)
     elif dropdown_path:
         local_path = "assets" + dropdown_path.replace("/assets", "")
-        pil_img = Image.open(local_path).convert("RGB")
+        pil_img = open_image(local_path)
         return pil_image_to_fig(pil_img, points=[], angles=None)
     return dash.no_update
 
@@ -250,17 +265,18 @@ def update_flexion_image(uploaded_content, dropdown_path):
     Input("extension-dropdown", "value"),
     prevent_initial_call=True
 )
+@timed_callback
 def update_extension_image(uploaded_content, dropdown_path):
     extension_points.clear()
     if uploaded_content:
         content_type, content_string = uploaded_content.split(',')
         decoded = base64.b64decode(content_string)
-        pil_img = Image.open(io.BytesIO(decoded)).convert("RGB")
+        pil_img = open_image(io.BytesIO(decoded))
 
         return pil_image_to_fig(pil_img)
     elif dropdown_path:
         local_path = "assets" + dropdown_path.replace("/assets", "")
-        pil_img = Image.open(local_path).convert("RGB")
+        pil_img = open_image(local_path)
 
         return pil_image_to_fig(pil_img)
     return dash.no_update
@@ -270,14 +286,14 @@ def update_extension_image(uploaded_content, dropdown_path):
     State("flexion-graph", "figure"),
     prevent_initial_call=True
 )
+@timed_callback
 def handle_flexion_click(clickData, fig):
     if clickData and len(flexion_points) < 5:
         x = clickData["points"][0]["x"]
         y = clickData["points"][0]["y"]
         flexion_points.append((x, y))
 
-    img_array = np.array(fig["data"][0]["z"], dtype=np.uint8)
-    pil_img = Image.fromarray(img_array)
+    pil_img = figure_image(fig)
     angles = calculate_angles(flexion_points) if len(flexion_points) == 5 else None
     return pil_image_to_fig(pil_img, flexion_points, angles)
 
@@ -288,13 +304,13 @@ def handle_flexion_click(clickData, fig):
     State("extension-graph", "figure"),
     prevent_initial_call=True
 )
+@timed_callback
 def handle_extension_click(clickData, fig):
     if clickData and len(extension_points) < 5:
         x, y = clickData["points"][0]["x"], clickData["points"][0]["y"]
         extension_points.append((x, y))
 
-    img_array = np.array(fig["data"][0]["z"], dtype=np.uint8)
-    pil_img = Image.fromarray(img_array)
+    pil_img = figure_image(fig)
     angles = calculate_angles(extension_points) if len(extension_points) == 5 else None
     return pil_image_to_fig(pil_img, extension_points, angles)
 @dash.callback(
@@ -351,8 +367,7 @@ def reset_extension(n):
 def undo_flexion(n, fig):
     if flexion_points:
         flexion_points.pop()
-        img_array = np.array(fig["data"][0]["z"], dtype=np.uint8)
-        pil_img = Image.fromarray(img_array)
+        pil_img = figure_image(fig)
         return pil_image_to_fig(pil_img, flexion_points)
     return dash.no_update
 
@@ -365,7 +380,6 @@ def undo_flexion(n, fig):
 def undo_extension(n, fig):
     if extension_points:
         extension_points.pop()
-        img_array = np.array(fig["data"][0]["z"], dtype=np.uint8)
-        pil_img = Image.fromarray(img_array)
+        pil_img = figure_image(fig)
         return pil_image_to_fig(pil_img, extension_points)
     return dash.no_update
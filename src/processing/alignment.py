@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+def window_center_times(n_windows, frame, step, fs):
+    """Center time (s) of each sliding window [k*step, k*step + frame)."""
+    return (np.arange(n_windows) * step + frame / 2) / fs
+
+
+@lru_cache(maxsize=128)
+def window_sample_indices(n_windows, frame, step, fs, target_fs, n_target):
+    """
+    Map every feature window to the nearest sample of another stream.
+
+    Parameters:
+        n_windows, frame, step: Sliding window layout on the EMG signal.
+        fs (float): EMG sampling rate.
+        target_fs (float): Sampling rate of the other stream (e.g. myocontrol).
+        n_target (int): Number of samples in the other stream.
+
+    Returns:
+        numpy.ndarray: Read-only integer indices into the other stream. The map
+        is cached, so it is computed once per dataset layout.
+    """
+    indices = np.rint(window_center_times(n_windows, frame, step, fs) * target_fs).astype(np.intp)
+    np.clip(indices, 0, n_target - 1, out=indices)
+    indices.setflags(write=False)
+    return indices
+
+
+def align_to_windows(series, n_windows, frame, step, fs, target_fs):
+    """Resample a stream onto the feature windows with one gather."""
+    return series[window_sample_indices(n_windows, frame, step, fs, target_fs, len(series))]
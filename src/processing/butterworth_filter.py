@@ -1,28 +1,52 @@
+from functools import lru_cache
+
 import numpy as np
-from scipy.signal import butter, filtfilt
 
+from src.processing.precision import as_working
+
+
+@lru_cache(maxsize=64)
+def design_butterworth(filter_type, cutoff, fs, order=4):
+    """
+    Design a Butterworth filter as second-order sections.
+
+    Designs are cached per (filter_type, cutoff, fs, order); cutoff must be
+    hashable (a number or a tuple for 'bandpass'). The array is
+    shared between callers and must not be modified.
+    """
+    from scipy.signal import butter
+
+    nyquist = 0.5 * fs
+    normal_cutoff = np.array(cutoff) / nyquist
+    sos = butter(order, normal_cutoff, btype=filter_type, output='sos')
+    return sos
 
-def butter_filter(signal, filter_type, cutoff, fs, order=4):
+
+def butter_filter(signal, filter_type, cutoff, fs, order=4, axis=-1):
     """
-    Apply a Butterworth filter to the signal.
+    Apply a zero-phase Butterworth filter to the signal.
 
     Parameters:
-    - signal: Input EMG signal (numpy array)
+    - signal: Input EMG signal (numpy array, any shape)
     - filter_type: 'low', 'high', 'bandpass', etc.
     - cutoff: Cutoff frequency (single value for 'low'/'high', tuple for 'bandpass')
     - fs: Sampling frequency
     - order: Filter order (default=4)
+    - axis: Axis along which to filter (default: last)
+
+    The filter runs in float64; the result is returned in the working precision.
     """
-    nyquist = 0.5 * fs
-    normal_cutoff = np.array(cutoff) / nyquist
-    b, a = butter(order, normal_cutoff, btype=filter_type)
-    return filtfilt(b, a, signal)
+    from scipy.signal import sosfiltfilt
+
+    if isinstance(cutoff, list):
+        cutoff = tuple(cutoff)
+    sos = design_butterworth(filter_type, cutoff, fs, order)
+    return as_working(sosfiltfilt(sos, signal, axis=axis))
 
 
 def apply_butterworth_filter(emg_data, filter_type, cutoff, fs=2000):
-    """Apply Butterworth filter to all EMG channels."""
-    filtered_data = [butter_filter(channel, filter_type, cutoff, fs) for channel in emg_data]
-    return np.array(filtered_data)
+    """Apply Butterworth filter to all EMG channels in one pass along the sample axis."""
+    return butter_filter(np.asarray(emg_data), filter_type, cutoff, fs, axis=-1)
 
 
 # Exportable function
@@ -1,7 +1,8 @@
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 
 def generate_force_comparison_figure(df):
+    from plotly.subplots import make_subplots
+
     time = df["Time (s)"]
 
     # Flexion data
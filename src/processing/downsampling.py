@@ -0,0 +1,70 @@
+import numpy as np
+
+from src.processing.precision import as_working
+
+# Default number of points sent to the browser per trace
+MAX_POINTS = 4000
+
+
+def minmax_downsample(signal, n_out=MAX_POINTS, start=0, stop=None):
+    """
+    Reduce a uniformly sampled signal to about n_out points, preserving peaks.
+
+    The range [start, stop) is split into n_out / 2 buckets and the minimum and
+    maximum of every bucket are kept in their original order, so spikes remain
+    visible however far the plot is zoomed out.
+
+    Parameters:
+        signal (numpy.ndarray): 1-D signal.
+        n_out (int): Target number of output points.
+        start, stop (int): Sample range to reduce (default: whole signal).
+
+    Returns:
+        tuple: (indices, values) of the retained samples.
+    """
+    n_total = len(signal)
+    start = max(0, int(start))
+    stop = n_total if stop is None else min(n_total, int(stop))
+    segment = np.asarray(signal[start:stop])
+    n = len(segment)
+
+    if n <= n_out:
+        return np.arange(start, start + n), segment
+
+    n_buckets = max(1, n_out // 2)
+    bucket = -(-n // n_buckets)
+    n_full = n // bucket
+    body = segment[:n_full * bucket].reshape(n_full, bucket)
+    pairs = np.stack([body.argmin(axis=1), body.argmax(axis=1)], axis=1)
+    pairs.sort(axis=1)
+    indices = (pairs + (np.arange(n_full) * bucket)[:, None]).ravel()
+
+    if n_full * bucket < n:
+        tail = segment[n_full * bucket:]
+        tail_pair = np.sort([tail.argmin(), tail.argmax()]) + n_full * bucket
+        indices = np.concatenate([indices, tail_pair])
+
+    return indices + start, segment[indices]
+
+
+def visible_range(x_range, fs, n_samples, margin=0.05):
+    """
+    Convert a visible time range in seconds to a sample range.
+
+    A small margin on both sides keeps the trace from ending at the plot edge
+    while panning. None means the whole signal.
+    """
+    if x_range is None:
+        return 0, n_samples
+    t0, t1 = sorted(float(value) for value in x_range)
+    pad = (t1 - t0) * margin
+    start = int(np.floor((t0 - pad) * fs))
+    stop = int(np.ceil((t1 + pad) * fs)) + 1
+    return max(0, start), min(n_samples, max(stop, 0))
+
+
+def downsample_trace(signal, fs, x_range=None, n_out=MAX_POINTS):
+    """Return (time, values) of a signal downsampled for the visible x_range; values are in the working precision."""
+    start, stop = visible_range(x_range, fs, len(signal))
+    indices, values = minmax_downsample(signal, n_out=n_out, start=start, stop=stop)
+    return indices / fs, as_working(values)
@@ -1,6 +1,11 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
 import numpy as np
-import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
+from src.processing.precision import working_dtype
 
 
 # Individual Feature Calculation Functions
@@ -100,36 +105,286 @@ def extract_features(signal, selected_features):
     return features
 
 
-# Sliding Window Feature Extraction for Signals
-def sliding_window_features(signal, frame=200, step=50, selected_features=None):
+# Names of all time-domain features, in the order used by the feature matrix
+FEATURE_NAMES = ["VAR", "RMS", "Integral EMG", "MAV", "LOG", "Wave Length", "AAC", "DASDV",
+                 "Zero Crossing", "WAMP", "MYOP"]
+
+# Frequency bands (Hz) of the band power features
+SPECTRAL_BANDS = {
+    "Band Power Low": (20, 50),
+    "Band Power Mid": (50, 150),
+    "Band Power High": (150, 450),
+}
+
+# Names of the frequency-domain features
+SPECTRAL_FEATURE_NAMES = ["MNF", "MDF", "PKF", "Spectral Entropy"] + list(SPECTRAL_BANDS)
+
+ALL_FEATURE_NAMES = FEATURE_NAMES + SPECTRAL_FEATURE_NAMES
+
+# Windows transformed per FFT batch (bounds the memory of the window matrix)
+SPECTRAL_BLOCK_WINDOWS = 8192
+
+
+def _window_variances(signal, frame, step, n_windows):
     """
-    Apply sliding window to compute features at each segment of the signal.
+    Population variance of every window, centred on the window's own mean.
+
+    Two passes over a strided view of the windows (in blocks of
+    SPECTRAL_BLOCK_WINDOWS): unlike sums of x and x², this does not lose
+    precision when the window mean is large compared to its spread (offsets,
+    drift).
+    """
+    windows = sliding_window_view(signal, frame)[::step][:n_windows]
+    result = np.empty(n_windows)
+    for start in range(0, n_windows, SPECTRAL_BLOCK_WINDOWS):
+        result[start:start + SPECTRAL_BLOCK_WINDOWS] = windows[start:start + SPECTRAL_BLOCK_WINDOWS].var(axis=1)
+    return result
+
+
+def _window_sums(values, frame, step, n_windows):
+    """Sum values over every window [k*step, k*step + frame) using one cumulative sum."""
+    dtype = np.int64 if values.dtype == bool else np.float64
+    csum = np.zeros(len(values) + 1, dtype=dtype)
+    np.cumsum(values, dtype=dtype, out=csum[1:])
+    starts = np.arange(n_windows) * step
+    return csum[starts + frame] - csum[starts]
+
+
+def spectral_feature_matrix(signal, frame=200, step=50, selected_features=None, fs=2000):
+    """
+    Compute frequency-domain features for all sliding windows at once.
+
+    The windows are taken as a strided view of the signal, mean-removed,
+    Hann-weighted and transformed by one batched real FFT (in blocks of
+    SPECTRAL_BLOCK_WINDOWS windows). Spectra are one-sided power spectral
+    densities, scaled like scipy.signal.welch with a single segment.
+
+    Features:
+        MNF: mean frequency (Hz), the power-weighted mean of the spectrum.
+        MDF: median frequency (Hz), splitting the power into two equal halves.
+        PKF: peak frequency (Hz) of the highest spectral bin.
+        Spectral Entropy: Shannon entropy of the normalized spectrum, scaled to [0, 1].
+        Band Power *: power in the SPECTRAL_BANDS ranges [low, high); the
+            highest band also includes its upper edge, so a bin on a shared
+            edge is counted once.
+
+    Windows without power give 0 for every feature.
 
     Parameters:
         signal (numpy.ndarray): Input EMG signal.
         frame (int): Window size.
         step (int): Step size.
-        selected_features (list): List of features to compute. Defaults to all features.
+        selected_features (list): Feature names (see SPECTRAL_FEATURE_NAMES). Defaults to all.
+        fs (float): Sampling rate in Hz.
 
     Returns:
-        pd.DataFrame: A DataFrame containing features over each window.
+        numpy.ndarray: Array of shape (n_windows, len(selected_features)).
+    """
+    if selected_features is None:
+        selected_features = SPECTRAL_FEATURE_NAMES
+    unknown = [name for name in selected_features if name not in SPECTRAL_FEATURE_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown features: {unknown}")
+
+    from scipy.signal import get_window
+
+    signal = np.asarray(signal, dtype=np.float64)
+    if len(signal) < frame:
+        raise ValueError("Signal length is smaller than the window size.")
+    windows = sliding_window_view(signal, frame)[::step]
+
+    taper = get_window("hann", frame)
+    freqs = np.fft.rfftfreq(frame, d=1 / fs)
+    # One-sided PSD: double every bin except DC and (for even frames) Nyquist
+    scale = np.full(len(freqs), 2 / (fs * np.sum(taper ** 2)))
+    scale[0] /= 2
+    if frame % 2 == 0:
+        scale[-1] /= 2
+    df = freqs[1] - freqs[0]
+    # Bands are half-open except the highest, which keeps its upper edge
+    top_edge = max(high for _, high in SPECTRAL_BANDS.values())
+
+    result = np.empty((len(windows), len(selected_features)))
+    for start in range(0, len(windows), SPECTRAL_BLOCK_WINDOWS):
+        block = windows[start:start + SPECTRAL_BLOCK_WINDOWS]
+        block = (block - block.mean(axis=1, keepdims=True)) * taper
+        power = np.abs(np.fft.rfft(block, axis=1)) ** 2 * scale
+        total = power.sum(axis=1)
+        has_power = total > 0
+        safe_total = np.where(has_power, total, 1.0)
+
+        for column, name in enumerate(selected_features):
+            if name == "MNF":
+                values = power @ freqs / safe_total
+            elif name == "MDF":
+                cumulative = np.cumsum(power, axis=1)
+                values = freqs[np.argmax(cumulative >= cumulative[:, -1:] / 2, axis=1)]
+            elif name == "PKF":
+                values = freqs[np.argmax(power, axis=1)]
+            elif name == "Spectral Entropy":
+                p = power / safe_total[:, None]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    values = -np.sum(np.where(p > 0, p * np.log(p), 0.0), axis=1) / np.log(len(freqs))
+            else:
+                low, high = SPECTRAL_BANDS[name]
+                upper = freqs <= high if high == top_edge else freqs < high
+                in_band = (freqs >= low) & upper
+                values = power[:, in_band].sum(axis=1) * df
+            result[start:start + len(block), column] = np.where(has_power, values, 0.0)
+    return result
+
+
+def sliding_window_feature_matrix(signal, frame=200, step=50, selected_features=None,
+                                  zc_threshold=0, wamp_threshold=0.01, myop_threshold=0.01, fs=2000):
+    """
+    Compute features for all sliding windows at once.
+
+    Every time-domain feature except VAR is a function of per-window sums (of
+    x², |x|, |Δx|, Δx² or threshold indicators), and each of those sums is
+    obtained for all windows from a single cumulative sum, so the cost is
+    O(len(signal)) independent of the window size and without a Python loop
+    over windows. VAR is centred on each window's mean over a strided view of
+    the windows (O(n_windows * frame)), so offsets and drift do not cancel out
+    its precision.
+    Frequency-domain features come from spectral_feature_matrix. Sums and
+    FFTs are computed in float64; the matrix is returned in the working precision.
+
+    Parameters:
+        signal (numpy.ndarray): Input EMG signal.
+        frame (int): Window size.
+        step (int): Step size.
+        selected_features (list): Feature names (see ALL_FEATURE_NAMES). Defaults to
+            the time-domain FEATURE_NAMES.
+        fs (float): Sampling rate in Hz (only used by frequency-domain features).
+
+    Returns:
+        numpy.ndarray: Array of shape (n_windows, len(selected_features)).
     """
     if selected_features is None:
-        selected_features = ["VAR", "RMS", "Integral EMG", "MAV", "LOG", "Wave Length", "AAC", "DASDV",
-                             "Zero Crossing", "WAMP", "MYOP"]
+        selected_features = FEATURE_NAMES
+    unknown = [name for name in selected_features if name not in ALL_FEATURE_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown features: {unknown}")
 
-    # Check if the signal length is sufficient
+    signal = np.asarray(signal, dtype=np.float64)
     if len(signal) < frame:
         raise ValueError("Signal length is smaller than the window size.")
+    n_windows = (len(signal) - frame) // step + 1
+    n_diff = frame - 1
+
+    spectral_names = [name for name in selected_features if name in SPECTRAL_FEATURE_NAMES]
+    spectral = spectral_feature_matrix(signal, frame, step, spectral_names, fs) if spectral_names else None
+
+    sums = {}
+
+    def window_sum(name):
+        # Per-window sums are shared between features and computed on demand
+        if name not in sums:
+            if name == "sq":
+                values = signal ** 2
+            elif name == "abs":
+                values = np.abs(signal)
+            elif name == "diff_abs":
+                values = np.abs(np.diff(signal))
+            elif name == "diff_sq":
+                values = np.diff(signal) ** 2
+            elif name == "zc":
+                values = np.diff(np.sign(signal - zc_threshold)) != 0
+            elif name == "wamp":
+                values = np.abs(np.diff(signal)) > wamp_threshold
+            elif name == "myop":
+                values = np.abs(signal) > myop_threshold
+            length = n_diff if name in ("diff_abs", "diff_sq", "zc", "wamp") else frame
+            sums[name] = _window_sums(values, length, step, n_windows)
+        return sums[name]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns = []
+        for name in selected_features:
+            if name in SPECTRAL_FEATURE_NAMES:
+                column = spectral[:, spectral_names.index(name)]
+            elif name == "VAR":
+                column = _window_variances(signal, frame, step, n_windows)
+            elif name == "RMS":
+                column = np.sqrt(window_sum("sq") / frame)
+            elif name == "Integral EMG":
+                column = window_sum("abs")
+            elif name == "MAV":
+                column = window_sum("abs") / frame
+            elif name == "LOG":
+                column = np.log(window_sum("sq") + 1e-10)
+            elif name == "Wave Length":
+                column = window_sum("diff_abs")
+            elif name == "AAC":
+                column = window_sum("diff_abs") / n_diff
+            elif name == "DASDV":
+                column = np.sqrt(window_sum("diff_sq") / n_diff)
+            elif name == "Zero Crossing":
+                column = window_sum("zc")
+            elif name == "WAMP":
+                column = window_sum("wamp")
+            else:
+                column = window_sum("myop") / frame
+            columns.append(column)
+
+    return np.column_stack(columns).astype(working_dtype(), copy=False)
+
+
+def batch_feature_tensor(emg_data, frame=200, step=50, selected_features=None, workers=None,
+                         executor="thread", fs=2000):
+    """
+    Compute sliding-window features for every channel of a recording.
+
+    Parameters:
+        emg_data (numpy.ndarray): EMG array of shape (channels, samples).
+        frame (int): Window size.
+        step (int): Step size.
+        selected_features (list): Feature names (see ALL_FEATURE_NAMES). Defaults to FEATURE_NAMES.
+        workers (int): Number of parallel workers (default: CPU count, 1 runs serially).
+        executor (str): 'thread' (NumPy releases the GIL in the heavy parts) or 'process'.
+        fs (float): Sampling rate in Hz (frequency-domain features).
+
+    Returns:
+        numpy.ndarray: Array of shape (channels, n_windows, n_features).
+    """
+    if np.ndim(emg_data) != 2:
+        raise ValueError("EMG data must have shape (channels, samples).")
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unknown executor: {executor}")
+
+    compute = partial(sliding_window_feature_matrix, frame=frame, step=step,
+                      selected_features=selected_features, fs=fs)
+    workers = min(workers or os.cpu_count() or 1, len(emg_data))
+    if workers <= 1:
+        return np.stack([compute(channel) for channel in emg_data])
+
+    pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+    with pool_class(max_workers=workers) as pool:
+        return np.stack(list(pool.map(compute, emg_data)))
 
-    windows = [signal[i:i + frame] for i in range(0, len(signal) - frame + 1, step)]
-    feature_list = []
 
-    for window in windows:
-        feature_values = extract_features(window, selected_features)
-        feature_list.append(feature_values)
+# Sliding Window Feature Extraction for Signals
+def sliding_window_features(signal, frame=200, step=50, selected_features=None, fs=2000):
+    """
+    Apply sliding window to compute features at each segment of the signal.
+
+    Parameters:
+        signal (numpy.ndarray): Input EMG signal.
+        frame (int): Window size.
+        step (int): Step size.
+        selected_features (list): List of features to compute. Defaults to all time-domain features.
+        fs (float): Sampling rate in Hz (frequency-domain features).
+
+    Returns:
+        pd.DataFrame: A DataFrame containing features over each window.
+    """
+    import pandas as pd
+
+    if selected_features is None:
+        selected_features = FEATURE_NAMES
 
-    return pd.DataFrame(feature_list)
+    matrix = sliding_window_feature_matrix(signal, frame, step, selected_features, fs=fs)
+    return pd.DataFrame(matrix, columns=list(selected_features))
 
 
 # Test function to print and verify feature extraction
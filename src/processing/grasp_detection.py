@@ -1,3 +1,8 @@
+import numpy as np
+
+from src.processing.segments import remove_short_segments
+
+
 def get_myocontrol_grasp(myocontrol_array, column_index, threshold=0.2):
     """
     Detect grasp using the specified column of the myocontrol array.
@@ -10,3 +15,13 @@ def get_myocontrol_grasp(myocontrol_array, column_index, threshold=0.2):
     return (col > threshold).astype(int)
 
 
+def detect_grasp_from_threshold(values, threshold, fs, min_duration_sec=0.3):
+    """
+    Detect grasp where feature values exceed the threshold for long enough.
+
+    values may be 1-D or 2-D (rows, samples); fs is the sampling rate of the
+    values (for feature series: signal fs / window step). Returns a binary
+    mask where 1 indicates grasp.
+    """
+    mask = np.asarray(values) > threshold
+    return remove_short_segments(mask, int(min_duration_sec * fs)).astype(int)
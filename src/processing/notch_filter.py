@@ -1,27 +1,49 @@
+from functools import lru_cache
+
 import numpy as np
-from scipy.signal import iirnotch, filtfilt
+
+from src.processing.precision import as_working
+
+
+@lru_cache(maxsize=64)
+def design_notch(notch_freq, fs, quality_factor=30):
+    """
+    Design a notch filter as second-order sections.
+
+    Designs are cached per (notch_freq, fs, quality_factor). The array is
+    shared between callers and must not be modified.
+    """
+    from scipy.signal import iirnotch, tf2sos
+
+    nyquist = 0.5 * fs
+    w0 = notch_freq / nyquist
+    b, a = iirnotch(w0, quality_factor)
+    sos = tf2sos(b, a)
+    return sos
 
 
-def notch_filter(signal, notch_freq, fs, quality_factor=30):
+def notch_filter(signal, notch_freq, fs, quality_factor=30, axis=-1):
     """
     Apply a Notch filter to remove specific frequency noise.
 
     Parameters:
-    - signal: Input EMG signal
+    - signal: Input EMG signal (numpy array, any shape)
     - notch_freq: Notch frequency (e.g., 50 Hz)
     - fs: Sampling frequency
     - quality_factor: Quality factor for the notch filter
+    - axis: Axis along which to filter (default: last)
+
+    The filter runs in float64; the result is returned in the working precision.
     """
-    nyquist = 0.5 * fs
-    w0 = notch_freq / nyquist
-    b, a = iirnotch(w0, quality_factor)
-    return filtfilt(b, a, signal)
+    from scipy.signal import sosfiltfilt
+
+    sos = design_notch(notch_freq, fs, quality_factor)
+    return as_working(sosfiltfilt(sos, signal, axis=axis))
 
 
 def apply_notch_filter(emg_data, notch_freq=50, fs=2000):
-    """Apply notch filter to all EMG channels."""
-    filtered_data = [notch_filter(channel, notch_freq, fs) for channel in emg_data]
-    return np.array(filtered_data)
+    """Apply notch filter to all EMG channels in one pass along the sample axis."""
+    return notch_filter(np.asarray(emg_data), notch_freq, fs, axis=-1)
 
 
 # Exportable function
@@ -0,0 +1,166 @@
+import os
+import tempfile
+import threading
+
+from src.metrics import time_stage
+from src.processing.butterworth_filter import process_with_butterworth
+from src.processing.notch_filter import process_with_notch
+from src.processing.rectification import process_with_rectification
+from src.processing.smoothing import apply_smoothing
+from src.processing.normalize import apply_normalization
+from src.processing.precision import as_working
+from src.processing.feature_extraction import sliding_window_feature_matrix
+from src.storage.cache import LRUCache
+
+# Byte budget for cached stage outputs (default 256 MiB)
+PIPELINE_CACHE_BYTES = int(os.environ.get("EMG_PIPELINE_CACHE_BYTES", 256 * 1024 ** 2))
+
+# Stage outputs are also written here, so stages computed by background job
+# processes are reused by the web workers (default 2 GiB in the temp directory)
+PIPELINE_DISK_CACHE_DIR = os.environ.get("EMG_PIPELINE_DISK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "emg-pipeline-cache"))
+PIPELINE_DISK_CACHE_BYTES = int(os.environ.get("EMG_PIPELINE_DISK_CACHE_BYTES", 2 * 1024 ** 3))
+
+# Runs are serialized per (dataset, channel) through one of this many locks
+# (pairs share a lock by hash, so the number of locks stays fixed)
+RUN_LOCK_STRIPES = 64
+
+# Stage order; every stage consumes the output of the previous one
+STAGES = ("butterworth", "notch", "rectify", "smoothing", "normalize", "features")
+
+
+def is_enabled(param):
+    """A stage whose parameter is None, False or 'none' passes its input through."""
+    return param is not None and param is not False and param != 'none'
+
+
+def apply_stage(stage, signal, param):
+    """
+    Apply one pipeline stage to a 1-D signal.
+
+    Parameters per stage:
+        butterworth: (fs, filter_type, cutoff)
+        notch: (fs, notch_freq)
+        rectify: True
+        smoothing: method name for apply_smoothing
+        normalize: True
+        features: (feature_name, frame, step, fs)
+    """
+    if not is_enabled(param):
+        return signal
+    if stage == "butterworth":
+        fs, filter_type, cutoff = param
+        return process_with_butterworth([signal], fs, filter_type, cutoff)[0]
+    if stage == "notch":
+        fs, notch_freq = param
+        return process_with_notch([signal], fs, notch_freq)[0]
+    if stage == "rectify":
+        return process_with_rectification([signal])[0]
+    if stage == "smoothing":
+        return apply_smoothing(signal, method=param)
+    if stage == "normalize":
+        return apply_normalization(signal)
+    if stage == "features":
+        feature_name, frame, step, fs = param
+        return sliding_window_feature_matrix(signal, frame, step, [feature_name], fs=fs)[:, 0]
+    raise ValueError(f"Unknown pipeline stage: {stage}")
+
+
+def run_stages(signal, params):
+    """Run a sequence of (stage, param) pairs without caching."""
+    for stage, param in params:
+        signal = apply_stage(stage, signal, param)
+    return signal
+
+
+class EMGPipeline:
+    """
+    Filter → notch → rectify → smooth → normalize → features, with cached stages.
+
+    The output of each enabled stage is cached under (dataset fingerprint,
+    channel, parameters of this and all upstream stages). A run starts from the
+    deepest cached stage, so changing one parameter only recomputes that stage
+    and the ones after it. Cached arrays are shared and made read-only, and
+    are kept in the working precision (see src.processing.precision).
+
+    Runs for the same dataset and channel are serialized, so callbacks that
+    fire together (processed plot, feature plot) compute shared stages once.
+
+    With a disk_cache (e.g. DiskArrayCache), stage outputs are also stored on
+    disk and looked up there on a memory miss, so they outlive the process
+    that computed them (background callbacks run in short-lived processes).
+    """
+
+    def __init__(self, cache=None, disk_cache=None):
+        self.cache = cache if cache is not None else LRUCache(PIPELINE_CACHE_BYTES)
+        self.disk_cache = disk_cache
+        self._locks = [threading.Lock() for _ in range(RUN_LOCK_STRIPES)]
+
+    def _channel_lock(self, fingerprint, channel):
+        return self._locks[hash((fingerprint, channel)) % RUN_LOCK_STRIPES]
+
+    def run(self, fingerprint, channel, load_signal, params, progress=None):
+        """
+        Run the pipeline for one channel.
+
+        Parameters:
+            fingerprint: Hashable identity of the dataset (file fingerprint or upload hash).
+            channel (int): Channel index.
+            load_signal (callable): Returns the raw channel; only called when no
+                stage output is cached.
+            params (sequence): (stage, param) pairs in STAGES order. Pass a
+                prefix to stop early, e.g. everything up to 'normalize'.
+            progress (callable, optional): Called as progress(done, total) with
+                the number of stages finished, once before computing and after
+                every computed stage.
+
+        Returns:
+            numpy.ndarray: Output of the last stage in params.
+        """
+        with self._channel_lock(fingerprint, channel):
+            return self._run(fingerprint, channel, load_signal, tuple(params), progress)
+
+    def _lookup(self, key):
+        signal = self.cache.get(key)
+        if signal is None and self.disk_cache is not None:
+            signal = self.disk_cache.get(key)
+            if signal is not None:
+                self.cache.put(key, signal)
+        return signal
+
+    def _store(self, key, signal):
+        self.cache.put(key, signal)
+        if self.disk_cache is not None:
+            self.disk_cache.put(key, signal)
+
+    def _run(self, fingerprint, channel, load_signal, params, progress):
+        keys = []
+        key = (fingerprint, channel)
+        for stage_param in params:
+            key = key + (stage_param,)
+            keys.append(key)
+
+        signal = None
+        start = 0
+        for index in range(len(keys) - 1, -1, -1):
+            if not is_enabled(params[index][1]):
+                continue
+            signal = self._lookup(keys[index])
+            if signal is not None:
+                start = index + 1
+                break
+
+        if signal is None:
+            signal = as_working(load_signal())
+        if progress is not None:
+            progress(start, len(params))
+        for index in range(start, len(params)):
+            stage, param = params[index]
+            if not is_enabled(param):
+                continue
+            with time_stage(stage):
+                signal = apply_stage(stage, signal, param)
+            signal.setflags(write=False)
+            self._store(keys[index], signal)
+            if progress is not None:
+                progress(index + 1, len(params))
+        return signal
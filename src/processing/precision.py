@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+
+# Supported working precisions of EMG samples, stage outputs and features
+PRECISIONS = {"float64": np.float64, "float32": np.float32}
+
+# Filters, running sums and FFTs accumulate in float64 either way; with
+# "float32" only the arrays that are kept (cached stage outputs, features,
+# shared recordings, plotted values) are stored in single precision
+_precision = os.environ.get("EMG_PRECISION", "float64")
+if _precision not in PRECISIONS:
+    raise ValueError(f"EMG_PRECISION must be one of {sorted(PRECISIONS)}, got {_precision!r}")
+
+
+def set_precision(name):
+    """
+    Set the process-wide working precision ('float64' or 'float32').
+
+    Meant to be called once at startup, before any data is loaded; arrays
+    cached before the change keep their dtype.
+    """
+    global _precision
+    if name not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {name!r} (expected one of {sorted(PRECISIONS)})")
+    _precision = name
+
+
+def get_precision():
+    return _precision
+
+
+def working_dtype():
+    """numpy dtype of arrays produced by the processing functions."""
+    return np.dtype(PRECISIONS[_precision])
+
+
+def as_working(array):
+    """Return array in the working precision (no copy if it already is)."""
+    return np.asarray(array, dtype=working_dtype())
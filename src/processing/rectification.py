@@ -1,9 +1,11 @@
 import numpy as np
 
+from src.processing.precision import working_dtype
+
 def rectify_signal(emg_data):
     """Rectify the EMG signal (absolute value of each channel)."""
     rectified_data = [np.abs(channel) for channel in emg_data]
-    return np.array(rectified_data)
+    return np.array(rectified_data, dtype=working_dtype())
 
 # Exportable function
 def process_with_rectification(emg_data):
@@ -0,0 +1,86 @@
+import numpy as np
+
+# Run-length helpers for binary masks (grasp detection, zones).
+# Functions accept 1-D masks or 2-D masks of shape (rows, samples); runs never
+# cross from one row into the next.
+
+
+def _as_rows(mask):
+    mask = np.asarray(mask, dtype=bool)
+    if mask.ndim not in (1, 2):
+        raise ValueError("Mask must be 1-D or 2-D (rows, samples).")
+    # Explicit row count: reshape(-1, 0) is ambiguous for an empty mask
+    return mask.reshape(mask.shape[0] if mask.ndim == 2 else 1, mask.shape[-1])
+
+
+def run_length_encode(values):
+    """
+    Run-length encode a 1-D array.
+
+    Returns:
+        tuple: (starts, lengths, run_values) with one entry per run of equal values.
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), values[:0]
+    starts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+    lengths = np.diff(np.append(starts, len(values)))
+    return starts, lengths, values[starts]
+
+
+def run_length_decode(lengths, run_values):
+    """Inverse of run_length_encode: repeat every run value by its length."""
+    return np.repeat(run_values, lengths)
+
+
+def segment_bounds(mask):
+    """
+    Find the onsets and offsets of True segments.
+
+    Offsets are exclusive, i.e. segment k covers mask[onsets[k]:offsets[k]].
+
+    Returns:
+        tuple: (onsets, offsets) for a 1-D mask, (rows, onsets, offsets) for a 2-D mask.
+    """
+    rows_mask = _as_rows(mask)
+    padded = np.zeros((rows_mask.shape[0], rows_mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = rows_mask
+    edges = np.diff(padded, axis=1)
+    # np.nonzero scans row by row, so onsets and offsets pair up in order
+    rows, onsets = np.nonzero(edges == 1)
+    _, offsets = np.nonzero(edges == -1)
+    if np.ndim(mask) == 1:
+        return onsets, offsets
+    return rows, onsets, offsets
+
+
+def mask_from_segments(shape, onsets, offsets, rows=None):
+    """Build a boolean mask of the given shape that is True on [onset, offset) segments."""
+    n_rows = 1 if len(shape) == 1 else shape[0]
+    rows = np.zeros(len(onsets), dtype=int) if rows is None else rows
+    steps = np.zeros((n_rows, shape[-1] + 1), dtype=np.int32)
+    steps[rows, onsets] += 1
+    steps[rows, offsets] -= 1
+    return (np.cumsum(steps[:, :-1], axis=1) > 0).reshape(shape)
+
+
+def remove_short_segments(mask, min_length):
+    """Drop True segments shorter than min_length samples."""
+    shape = np.shape(mask)
+    rows, onsets, offsets = segment_bounds(_as_rows(mask))
+    keep = (offsets - onsets) >= min_length
+    return mask_from_segments(shape, onsets[keep], offsets[keep], rows[keep])
+
+
+def bridge_gaps(mask, max_gap):
+    """Fill False gaps of at most max_gap samples between two True segments."""
+    shape = np.shape(mask)
+    rows, onsets, offsets = segment_bounds(_as_rows(mask))
+    if len(onsets) == 0:
+        return np.zeros(shape, dtype=bool)
+    # A gap sits between segment k and k + 1 of the same row
+    same_row = rows[1:] == rows[:-1]
+    bridged = same_row & ((onsets[1:] - offsets[:-1]) <= max_gap)
+    keep_onset = np.concatenate(([True], ~bridged))
+    keep_offset = np.concatenate((~bridged, [True]))
+    return mask_from_segments(shape, onsets[keep_onset], offsets[keep_offset], rows[keep_onset])
@@ -1,43 +1,99 @@
 import numpy as np
-from scipy.signal import savgol_filter
-from scipy.ndimage import gaussian_filter1d
 
-def smooth_with_sg(signal, window_length=101, polyorder=2):
+from src.processing.precision import as_working
+
+# Kernels at least this long are applied by FFT convolution instead of directly
+FFT_MIN_KERNEL = 129
+
+def smooth_with_sg(signal, window_length=101, polyorder=2, axis=-1):
     """
     Smooth signal using Savitzky-Golay filter.
     - window_length: Odd integer specifying the smoothing window length.
     - polyorder: Order of the polynomial used in smoothing.
+    - axis: Axis along which to smooth.
+
+    Long windows are applied by FFT; the result matches savgol_filter
+    (mode='interp') including the polynomial fits at both edges.
     """
-    return savgol_filter(signal, window_length=window_length, polyorder=polyorder)
+    from scipy.signal import fftconvolve, savgol_coeffs, savgol_filter
 
-def smooth_with_gaussian(signal, sigma=2):
-    """Smooth signal using Gaussian filter."""
-    return gaussian_filter1d(signal, sigma=sigma)
+    signal = np.asarray(signal, dtype=float)
+    n = signal.shape[axis]
+    if window_length < FFT_MIN_KERNEL or n < 2 * window_length:
+        return savgol_filter(signal, window_length=window_length, polyorder=polyorder, axis=axis)
 
-def smooth_with_mav(signal, window_size=100):
-    """Smooth signal using Mean Absolute Value (MAV) with a sliding window."""
-    return np.convolve(np.abs(signal), np.ones(window_size) / window_size, mode='same')
+    signal = np.moveaxis(signal, axis, -1)
+    coeffs = savgol_coeffs(window_length, polyorder)
+    smoothed = fftconvolve(signal, coeffs.reshape((1,) * (signal.ndim - 1) + (-1,)), mode='same', axes=-1)
+    # Edges: savgol_filter on a single window evaluates the same polynomial fits
+    half = window_length // 2
+    smoothed[..., :half] = savgol_filter(signal[..., :window_length], window_length, polyorder, axis=-1)[..., :half]
+    smoothed[..., -half:] = savgol_filter(signal[..., -window_length:], window_length, polyorder, axis=-1)[..., -half:]
+    return np.moveaxis(smoothed, -1, axis)
 
-def smooth_with_rms(signal, window_size=100):
-    """Smooth signal using Root Mean Square (RMS) with a sliding window."""
-    squared_signal = np.power(signal, 2)
-    rms_signal = np.sqrt(np.convolve(squared_signal, np.ones(window_size) / window_size, mode='same'))
-    return rms_signal
+def smooth_with_gaussian(signal, sigma=2, axis=-1):
+    """
+    Smooth signal using Gaussian filter.
+
+    Wide kernels are applied by FFT on a symmetrically padded signal, which
+    matches gaussian_filter1d's default 'reflect' edges.
+    """
+    from scipy.ndimage import gaussian_filter1d
+    from scipy.signal import fftconvolve
+
+    signal = np.asarray(signal, dtype=float)
+    radius = int(4.0 * sigma + 0.5)
+    n = signal.shape[axis]
+    if 2 * radius + 1 < FFT_MIN_KERNEL or n <= radius:
+        return gaussian_filter1d(signal, sigma=sigma, axis=axis)
+
+    signal = np.moveaxis(signal, axis, -1)
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel /= kernel.sum()
+    padded = np.pad(signal, [(0, 0)] * (signal.ndim - 1) + [(radius, radius)], mode='symmetric')
+    smoothed = fftconvolve(padded, kernel.reshape((1,) * (signal.ndim - 1) + (-1,)), mode='valid', axes=-1)
+    return np.moveaxis(smoothed, -1, axis)
+
+def smooth_with_mav(signal, window_size=100, axis=-1):
+    """
+    Smooth signal using Mean Absolute Value (MAV) with a sliding window.
+
+    Running-sum implementation, O(n) in the window size. Windows and zero
+    padding at the edges are the same as np.convolve(..., mode='same') with a
+    box kernel.
+    """
+    from scipy.ndimage import uniform_filter1d
+
+    rectified = np.abs(np.asarray(signal, dtype=float))
+    return uniform_filter1d(rectified, size=window_size, axis=axis, mode='constant', cval=0.0)
+
+def smooth_with_rms(signal, window_size=100, axis=-1):
+    """Smooth signal using Root Mean Square (RMS) with a sliding window (same windows as MAV)."""
+    from scipy.ndimage import uniform_filter1d
+
+    squared_signal = np.square(np.asarray(signal, dtype=float))
+    mean_square = uniform_filter1d(squared_signal, size=window_size, axis=axis, mode='constant', cval=0.0)
+    # Running sums can leave tiny negative residues where the signal is zero
+    return np.sqrt(np.maximum(mean_square, 0.0))
 
 # Exportable function
-def apply_smoothing(signal, method, **kwargs):
+def apply_smoothing(signal, method, axis=-1, **kwargs):
     """
     Apply a smoothing method to the signal.
-    - method: 'sg' (Savitzky-Golay), 'mav' (MAV), or 'rms'.
+    - signal: 1-D signal or N-D array such as (channels, samples).
+    - method: 'sg' (Savitzky-Golay), 'mav' (MAV), 'rms' or 'gaussian'.
+    - axis: Axis along which to smooth (default: last, i.e. samples).
     - kwargs: Additional parameters like window_length, polyorder, window_size.
+
+    Smoothing runs in float64; the result is returned in the working precision.
     """
     if method == 'sg':
-        return smooth_with_sg(signal, window_length=kwargs.get('window_length', 101), polyorder=kwargs.get('polyorder', 2))
+        return as_working(smooth_with_sg(signal, window_length=kwargs.get('window_length', 101), polyorder=kwargs.get('polyorder', 2), axis=axis))
     elif method == 'mav':
-        return smooth_with_mav(signal, window_size=kwargs.get('window_size', 100))
+        return as_working(smooth_with_mav(signal, window_size=kwargs.get('window_size', 100), axis=axis))
     elif method == 'rms':
-        return smooth_with_rms(signal, window_size=kwargs.get('window_size', 100))
+        return as_working(smooth_with_rms(signal, window_size=kwargs.get('window_size', 100), axis=axis))
     elif method == 'gaussian':
-        return smooth_with_gaussian(signal, sigma=kwargs.get('sigma', 2))
+        return as_working(smooth_with_gaussian(signal, sigma=kwargs.get('sigma', 2), axis=axis))
     return signal  # Default: return original signal
-
@@ -0,0 +1,155 @@
+import fcntl
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from src.processing.butterworth_filter import design_butterworth
+from src.processing.notch_filter import design_notch
+
+# File-backed ring buffers start with the int64 sample count
+_HEADER_BYTES = 8
+
+
+class RingBuffer:
+    """
+    Fixed-size multi-channel buffer holding the most recent samples.
+
+    Samples are addressed by their absolute position in the stream (the
+    number of samples written before them), so readers can ask for
+    "everything since position p" without sharing any state with the writer.
+
+    With a path, the buffer lives in a memory-mapped file (sample count
+    followed by the samples) guarded by an fcntl lock, so other processes can
+    read it by opening the same path with create=False.
+    """
+
+    def __init__(self, n_channels, capacity, dtype=np.float64, path=None, create=True):
+        self.n_channels = n_channels
+        self.capacity = int(capacity)
+        self._lock = threading.Lock()
+        self._file = None
+        if path is None:
+            self._data = np.zeros((n_channels, self.capacity), dtype=dtype)
+            self._total = np.zeros(1, dtype=np.int64)
+            return
+        if create:
+            with open(path, "wb") as file:
+                file.truncate(_HEADER_BYTES + np.dtype(dtype).itemsize * n_channels * self.capacity)
+        mode = "r+" if create else "r"
+        self._total = np.memmap(path, dtype=np.int64, mode=mode, shape=(1,))
+        self._data = np.memmap(path, dtype=dtype, mode=mode, offset=_HEADER_BYTES, shape=(n_channels, self.capacity))
+        self._file = open(path, "rb")
+
+    @property
+    def total(self):
+        return int(self._total[0])
+
+    @total.setter
+    def total(self, value):
+        self._total[0] = value
+
+    @contextmanager
+    def _locked(self, exclusive):
+        # The threading lock covers this process; flock covers the others
+        with self._lock:
+            if self._file is None:
+                yield
+                return
+            fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def write(self, chunk):
+        """Append a (channels, samples) chunk, overwriting the oldest samples."""
+        chunk = np.asarray(chunk)
+        n_in = chunk.shape[1]
+        chunk = chunk[:, -self.capacity:]
+        n = chunk.shape[1]
+        with self._locked(exclusive=True):
+            start = (self.total + n_in - n) % self.capacity
+            first = min(n, self.capacity - start)
+            self._data[:, start:start + first] = chunk[:, :first]
+            self._data[:, :n - first] = chunk[:, first:]
+            self.total += n_in
+
+    def read_since(self, position):
+        """
+        Return (start, samples) for everything written at or after position.
+
+        If position is older than the buffer, reading starts at the oldest
+        sample still held; start tells where that is.
+        """
+        with self._locked(exclusive=False):
+            start = max(int(position), self.total - self.capacity, 0)
+            n = self.total - start
+            if n <= 0:
+                return self.total, self._data[:, :0].copy()
+            indices = np.arange(start, self.total) % self.capacity
+            return start, self._data[:, indices]
+
+    def latest(self, n):
+        """Return the last n samples (fewer if the stream is shorter)."""
+        return self.read_since(self.total - n)[1]
+
+
+class CausalFilter:
+    """
+    Causal SOS filter that keeps its state across chunks.
+
+    The filter state is initialised to the steady state for the first sample of
+    each channel, so the stream starts without a step transient.
+    """
+
+    def __init__(self, sos):
+        self.sos = sos
+        self._zi = None
+
+    def process(self, chunk):
+        from scipy.signal import sosfilt, sosfilt_zi
+
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if self._zi is None:
+            self._zi = sosfilt_zi(self.sos)[:, None, :] * chunk[:, :1][None, :, :]
+        filtered, self._zi = sosfilt(self.sos, chunk, axis=-1, zi=self._zi)
+        return filtered
+
+    def reset(self):
+        self._zi = None
+
+
+class StreamProcessor:
+    """
+    Causal counterpart of the Butterworth and notch stages for live data.
+
+    Parameters:
+        fs (float): Sampling frequency.
+        butterworth (tuple): Optional (filter_type, cutoff) for the Butterworth filter.
+        notch_freq (float): Optional notch frequency (e.g. 50 Hz).
+        rectify (bool): Take the absolute value after filtering.
+    """
+
+    def __init__(self, fs, butterworth=None, notch_freq=None, rectify=False):
+        self.filters = []
+        if butterworth is not None:
+            filter_type, cutoff = butterworth
+            if isinstance(cutoff, list):
+                cutoff = tuple(cutoff)
+            self.filters.append(CausalFilter(design_butterworth(filter_type, cutoff, fs)))
+        if notch_freq is not None:
+            self.filters.append(CausalFilter(design_notch(notch_freq, fs)))
+        self.rectify = rectify
+
+    def process(self, chunk):
+        signal = np.asarray(chunk, dtype=np.float64)
+        for causal_filter in self.filters:
+            signal = causal_filter.process(signal)
+        if self.rectify:
+            signal = np.abs(signal)
+        return signal
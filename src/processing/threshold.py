@@ -12,9 +12,139 @@ THRESHOLDS = {
     "DASDV": 0.01,
     "Zero Crossing": 10,
     "WAMP": 10,
-    "MYOP": 0.01
+    "MYOP": 0.01,
+    "MNF": 80,
+    "MDF": 70,
+    "PKF": 60,
+    "Spectral Entropy": 0.8,
+    "Band Power Low": 0.002,
+    "Band Power Mid": 0.005,
+    "Band Power High": 0.003
 }
 
+# Parameters of the dynamic threshold methods
+STD_FACTOR = 0.5
+PERCENTILE = 85
+
+
+class RunningMeanStd:
+    """
+    Welford-style running mean and standard deviation.
+
+    Chunks are folded in with the parallel update of Chan et al., so estimators
+    built on different chunks or workers can be merged exactly.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return self
+        chunk_mean = values.mean()
+        chunk_m2 = np.sum((values - chunk_mean) ** 2)
+        return self._combine(len(values), chunk_mean, chunk_m2)
+
+    def merge(self, other):
+        return self._combine(other.count, other.mean, other.m2)
+
+    def _combine(self, count, mean, m2):
+        if count == 0:
+            return self
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        return self
+
+    @property
+    def std(self):
+        """Population standard deviation (same as np.std)."""
+        return np.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def threshold(self):
+        return self.mean + STD_FACTOR * self.std
+
+
+class TDigest:
+    """
+    Mergeable quantile sketch (merging t-digest).
+
+    Values are summarised by at most about compression / 2 weighted centroids,
+    kept small near the tails so that high percentiles stay accurate. Memory
+    does not grow with the number of values seen.
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return self.weights.sum()
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return self
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        return self._compress(np.concatenate([self.means, values]),
+                              np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other):
+        if len(other.weights) == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self._compress(np.concatenate([self.means, other.means]),
+                              np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means, weights):
+        if len(weights) == 0:
+            return self
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        # k1 scale function: clusters are narrow near q = 0 and q = 1
+        k = self.compression / (2 * np.pi) * (np.arcsin(2 * q - 1) + np.pi / 2)
+        groups = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+        return self
+
+    def quantile(self, q):
+        """Estimate the q-quantile (0 <= q <= 1)."""
+        if len(self.weights) == 0:
+            return np.nan
+        cumulative = np.cumsum(self.weights)
+        centers = cumulative - self.weights / 2
+        ranks = np.concatenate(([0], centers, [cumulative[-1]]))
+        values = np.concatenate(([self.min], self.means, [self.max]))
+        return float(np.interp(q * cumulative[-1], ranks, values))
+
+    def threshold(self):
+        return self.quantile(PERCENTILE / 100)
+
+
+def threshold_estimator(method):
+    """Return an empty incremental estimator for a dynamic threshold method."""
+    method = method.lower()
+    if method == "mean_std":
+        return RunningMeanStd()
+    if method == "percentile":
+        return TDigest()
+    raise ValueError(f"No incremental estimator for threshold method: {method}")
+
 
 def get_threshold(feature_name, values=None, method="fixed"):
     """
@@ -22,7 +152,8 @@ def get_threshold(feature_name, values=None, method="fixed"):
 
     Parameters:
         feature_name (str): Name of the EMG feature.
-        values (np.ndarray or list): Extracted feature values (required for dynamic methods).
+        values (np.ndarray, list or estimator): Extracted feature values (required for
+            dynamic methods), or a RunningMeanStd / TDigest already fed with them.
         method (str): 'fixed', 'mean_std', or 'percentile'.
 
     Returns:
@@ -33,15 +164,18 @@ def get_threshold(feature_name, values=None, method="fixed"):
     if method == "fixed":
         return THRESHOLDS.get(feature_name, 0.1)
 
+    if isinstance(values, (RunningMeanStd, TDigest)):
+        return values.threshold() if values.count else 0.1
+
     if values is None or len(values) == 0:
         return 0.1  # fallback
 
-    values = np.array(values)
+    values = np.asarray(values)
 
     if method == "mean_std":
-        return np.mean(values) + 0.5 * np.std(values)
+        return RunningMeanStd().update(values).threshold()
     elif method == "percentile":
-        return np.percentile(values, 85)
+        return np.percentile(values, PERCENTILE)
 
     # Fallback
     return THRESHOLDS.get(feature_name, 0.1)
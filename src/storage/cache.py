@@ -0,0 +1,191 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def estimate_nbytes(obj):
+    """
+    Estimate the in-memory size of a loaded object (numpy arrays dominate).
+
+    Memory-mapped arrays count as zero: their pages belong to the OS page cache.
+    Caches holding them are bounded by max_entries instead.
+    """
+    if isinstance(obj, np.memmap):
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_nbytes(value) for value in obj)
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its values in bytes.
+
+    Parameters:
+        max_bytes (int): Byte budget for in-memory values (see estimate_nbytes;
+            memory-mapped arrays count as zero). Least recently used entries
+            are evicted once the budget is exceeded; values larger than the
+            whole budget are never stored.
+        ttl (float): Optional idle time in seconds after which an entry that
+            has not been read or written expires.
+        max_entries (int): Optional limit on the number of entries, for values
+            whose size estimate is zero (memory-mapped arrays).
+    """
+
+    def __init__(self, max_bytes, ttl=None, max_entries=None):
+        self.max_bytes = int(max_bytes)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._expire()
+            if key in self._entries:
+                value, nbytes, _ = self._entries[key]
+                self._entries[key] = (value, nbytes, time.monotonic())
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def put(self, key, value, nbytes=None):
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+        with self._lock:
+            self._discard(key)
+            self._expire()
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes, time.monotonic())
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes or (self.max_entries is not None and len(self._entries) > self.max_entries):
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def expire(self):
+        """Drop entries that have been idle for longer than the TTL."""
+        with self._lock:
+            self._expire()
+
+    def pop(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self):
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _expire(self):
+        # Entries are kept in access order, so expired ones are at the front
+        if self.ttl is None:
+            return
+        deadline = time.monotonic() - self.ttl
+        while self._entries:
+            oldest = next(iter(self._entries))
+            if self._entries[oldest][2] > deadline:
+                break
+            self._discard(oldest)
+            self.expirations += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class DiskArrayCache:
+    """
+    numpy arrays kept on disk with diskcache, shared by all processes of a host.
+
+    Used behind an in-memory LRUCache for values that must survive the process
+    that computed them, such as pipeline stages computed in background jobs.
+    diskcache evicts least recently used entries beyond max_bytes.
+
+    Parameters:
+        directory (str): Cache directory (created if missing).
+        max_bytes (int): Byte budget of the directory.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self._cache = None
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+
+    def _store(self):
+        # SQLite connections must not be shared across fork, so every process opens its own
+        if self._pid != os.getpid():
+            import diskcache
+            self._cache = diskcache.Cache(self.directory, size_limit=self.max_bytes,
+                                          eviction_policy="least-recently-used")
+            self._pid = os.getpid()
+        return self._cache
+
+    def get(self, key, default=None):
+        value = self._store().get(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        dtype, shape, data = value
+        # Backed by immutable bytes, so the array is read-only
+        return np.frombuffer(data, dtype=dtype).reshape(shape)
+
+    def put(self, key, array):
+        array = np.ascontiguousarray(array)
+        self._store().set(key, (array.dtype.str, array.shape, array.tobytes()))
+
+    def stats(self):
+        store = self._store()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(store),
+            "bytes": store.volume(),
+            "max_bytes": self.max_bytes,
+        }
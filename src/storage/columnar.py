@@ -0,0 +1,186 @@
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+import warnings
+
+import numpy as np
+
+# A columnar store is a directory of .npy arrays plus a small JSON header
+STORE_SUFFIX = ".emgcol"
+HEADER_FILE = "header.json"
+FORMAT_VERSION = 1
+
+
+def store_path_for(file_path):
+    """Default store directory for a recording: next to it, with the .emgcol suffix."""
+    return os.path.splitext(file_path)[0] + STORE_SUFFIX
+
+
+def is_store(path):
+    """Return True if path is a columnar store directory."""
+    return os.path.isfile(os.path.join(path, HEADER_FILE))
+
+
+def read_header(store_dir):
+    with open(os.path.join(store_dir, HEADER_FILE)) as file:
+        return json.load(file)
+
+
+def _channel_major(array):
+    """
+    Lay out a 2-D array so that each channel is contiguous on disk.
+
+    EMG is stored as (channels, samples) and stays C-ordered; myocontrol is
+    (samples, columns), so it is written in Fortran order instead.
+    """
+    if array.ndim == 2 and array.shape[0] > array.shape[1]:
+        return np.asfortranarray(array)
+    return np.ascontiguousarray(array)
+
+
+def _json_value(value):
+    """Convert numpy scalars and arrays (also nested in dicts and lists) to plain Python values."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return _json_value(value.tolist())
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    return value
+
+
+def write_store(data, store_dir, source=None, float_dtype=None):
+    """
+    Write a recording dict as a columnar store.
+
+    Parameters:
+        data (dict): Recording, e.g. {'emg': ndarray, 'myocontrol': ndarray}.
+            Other fields are kept as JSON attributes (numpy scalars become
+            Python numbers); fields that cannot be stored are left out with
+            a RuntimeWarning.
+        store_dir (str): Target directory. An existing complete store of the same
+            source is kept as is; any other existing store is replaced atomically.
+        source (dict): Optional fingerprint of the file the data came from.
+        float_dtype: Optional dtype floating point arrays are converted to (e.g. float32).
+
+    Returns:
+        str: The store directory.
+    """
+    # Unique per writer thread, so concurrent ingests never share a directory
+    tmp_dir = f"{store_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    header = {"version": FORMAT_VERSION, "source": source, "arrays": {}, "attrs": {}}
+    for name, value in data.items():
+        if isinstance(value, (np.ndarray, list, tuple)):
+            array = np.asarray(value)
+            if float_dtype is not None and array.dtype.kind == 'f':
+                array = array.astype(float_dtype, copy=False)
+            array = _channel_major(array)
+            if array.dtype != object:
+                file_name = f"{name}.npy"
+                np.save(os.path.join(tmp_dir, file_name), array)
+                header["arrays"][name] = {
+                    "file": file_name,
+                    "shape": list(array.shape),
+                    "dtype": array.dtype.str,
+                    "order": "F" if array.ndim > 1 and not array.flags.c_contiguous else "C",
+                }
+                continue
+        value = _json_value(value)
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            warnings.warn(f"Field {name!r} of type {type(value).__name__} cannot be stored and is left out of {store_dir}",
+                          RuntimeWarning, stacklevel=2)
+            continue
+        header["attrs"][name] = value
+
+    with open(os.path.join(tmp_dir, HEADER_FILE), "w") as file:
+        json.dump(header, file, indent=2)
+
+    _publish(tmp_dir, store_dir, source)
+    return store_dir
+
+
+def _publish(tmp_dir, store_dir, source):
+    """
+    Move a finished store from tmp_dir to store_dir.
+
+    Readers may have the current store memory-mapped, so it is never deleted
+    in place: a complete store of the same source (written concurrently by
+    another thread or process) is kept and tmp_dir discarded, and an outdated
+    store is first renamed aside. Mapped arrays of a renamed store stay valid.
+    """
+    if is_store(store_dir) and read_header(store_dir).get("source") == source:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+    if os.path.isdir(store_dir):
+        old_dir = f"{tmp_dir}.old"
+        try:
+            os.replace(store_dir, old_dir)
+        except FileNotFoundError:
+            pass  # moved aside by a concurrent writer
+        else:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    try:
+        os.replace(tmp_dir, store_dir)
+    except OSError:
+        # Another writer published first (the target is no longer empty)
+        if not is_store(store_dir):
+            raise
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def ingest_pickle(file_path, store_dir=None, float_dtype=None):
+    """Convert a myocontrol .pkl recording into a columnar store (next to it by default)."""
+    if store_dir is None:
+        store_dir = store_path_for(file_path)
+    stat = os.stat(file_path)
+    source = {"path": os.path.abspath(file_path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    with open(file_path, 'rb') as file:
+        data = pickle.load(file)
+    return write_store(data, store_dir, source=source, float_dtype=float_dtype)
+
+
+def find_store(file_path):
+    """
+    Return the up-to-date store for a .pkl recording, or None.
+
+    A store whose recorded source size/mtime no longer match the file is stale
+    and ignored.
+    """
+    store_dir = store_path_for(file_path)
+    if not is_store(store_dir):
+        return None
+    source = read_header(store_dir).get("source") or {}
+    stat = os.stat(file_path)
+    if source.get("mtime_ns") != stat.st_mtime_ns or source.get("size") != stat.st_size:
+        return None
+    return store_dir
+
+
+def open_store(store_dir):
+    """
+    Open a columnar store as a recording dict.
+
+    Arrays are memory-mapped read-only, so selecting a channel only touches
+    the pages of that channel.
+    """
+    header = read_header(store_dir)
+    data = dict(header.get("attrs", {}))
+    for name, info in header["arrays"].items():
+        data[name] = np.load(os.path.join(store_dir, info["file"]), mmap_mode='r')
+    return data
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.storage.columnar data/myocontrol_data_1.pkl [...]
+    for path in sys.argv[1:]:
+        print(f"{path} -> {ingest_pickle(path)}")
@@ -0,0 +1,305 @@
+import hashlib
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from src.processing.streaming import RingBuffer
+from src.processing.threshold import threshold_estimator
+
+# Wire format: interleaved little-endian float32 frames, one value per channel
+SAMPLE_DTYPE = np.dtype('<f4')
+
+# Running acquisitions publish their buffers and status here, so any worker
+# process can serve the live page of a session
+LIVE_STATE_DIR = os.environ.get("EMG_LIVE_STATE_DIR", os.path.join(tempfile.gettempdir(), "emg-live"))
+
+# Seconds between status.json updates of a running acquisition
+STATUS_INTERVAL_SECONDS = 0.5
+
+# Dynamic thresholds kept up to date over the whole processed stream
+THRESHOLD_METHODS = ("mean_std", "percentile")
+
+
+class _FrameDecoder:
+    """Turn a byte stream into (channels, samples) chunks, keeping partial frames."""
+
+    def __init__(self, n_channels):
+        self.n_channels = n_channels
+        self._pending = b""
+
+    def decode(self, payload):
+        payload = self._pending + payload
+        frame_bytes = self.n_channels * SAMPLE_DTYPE.itemsize
+        usable = len(payload) - len(payload) % frame_bytes
+        self._pending = payload[usable:]
+        samples = np.frombuffer(payload[:usable], dtype=SAMPLE_DTYPE)
+        return samples.reshape(-1, self.n_channels).T
+
+
+class SocketSource:
+    """
+    Read samples from a local socket.
+
+    TCP connects to an acquisition server at address; UDP binds to address
+    and receives datagrams.
+    """
+
+    def __init__(self, address, n_channels, protocol='tcp', timeout=0.1):
+        host, port = address.rsplit(':', 1)
+        self._decoder = _FrameDecoder(n_channels)
+        if protocol == 'tcp':
+            self._socket = socket.create_connection((host, int(port)), timeout=timeout)
+        elif protocol == 'udp':
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.bind((host, int(port)))
+        else:
+            raise ValueError(f"Unknown protocol: {protocol}")
+        self._socket.settimeout(timeout)
+
+    def read_chunk(self):
+        """Return the next (channels, samples) chunk; it is empty if nothing arrived."""
+        try:
+            payload = self._socket.recv(1 << 16)
+        except socket.timeout:
+            payload = b""
+        else:
+            if not payload and self._socket.type == socket.SOCK_STREAM:
+                raise ConnectionError("Acquisition server closed the connection")
+        return self._decoder.decode(payload)
+
+    def close(self):
+        self._socket.close()
+
+
+class FileTailSource:
+    """Follow a file that an acquisition program keeps appending samples to."""
+
+    def __init__(self, path, n_channels, from_start=False, poll_interval=0.02):
+        self._file = open(path, 'rb')
+        if not from_start:
+            self._file.seek(0, os.SEEK_END)
+        self._decoder = _FrameDecoder(n_channels)
+        self.poll_interval = poll_interval
+
+    def read_chunk(self):
+        payload = self._file.read(1 << 16)
+        if not payload:
+            time.sleep(self.poll_interval)
+        return self._decoder.decode(payload)
+
+    def close(self):
+        self._file.close()
+
+
+class LiveAcquisition:
+    """
+    Background reader that filters incoming chunks into ring buffers.
+
+    The reading thread runs in the process that started the acquisition. Its
+    ring buffers are files in state_dir and its status is written to
+    status.json there, so LiveView can follow it from other processes; it
+    stops when a 'stop' file appears in state_dir.
+
+    Each channel's processed samples are also folded into one incremental
+    estimator per THRESHOLD_METHODS entry whenever the status is written, so
+    the published thresholds cover the whole stream, not only the samples
+    still in the ring buffer.
+
+    Parameters:
+        source: SocketSource or FileTailSource.
+        processor: StreamProcessor applied to every chunk.
+        n_channels (int): Channels per frame.
+        capacity (int): Samples kept per channel in each ring buffer.
+        state_dir (str): Directory the acquisition is published in (created).
+    """
+
+    def __init__(self, source, processor, n_channels, capacity, state_dir):
+        self.source = source
+        self.processor = processor
+        self.state_dir = state_dir
+        os.makedirs(state_dir)
+        _write_json(os.path.join(state_dir, "meta.json"), {"n_channels": n_channels, "capacity": int(capacity)})
+        self.raw = RingBuffer(n_channels, capacity, path=os.path.join(state_dir, "raw.buf"))
+        self.processed = RingBuffer(n_channels, capacity, path=os.path.join(state_dir, "processed.buf"))
+        self.chunk_latency_ms = 0.0
+        self.error = None
+        self.thresholds = {}
+        self._estimators = {method: [threshold_estimator(method) for _ in range(n_channels)] for method in THRESHOLD_METHODS}
+        self._estimated = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._write_status()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def _update_thresholds(self):
+        start, processed = self.processed.read_since(self._estimated)
+        self._estimated = start + processed.shape[1]
+        if processed.shape[1] == 0:
+            return
+        for method, estimators in self._estimators.items():
+            for estimator, samples in zip(estimators, processed):
+                estimator.update(samples)
+        self.thresholds = {method: [estimator.threshold() for estimator in estimators]
+                           for method, estimators in self._estimators.items()}
+
+    def _write_status(self):
+        self._update_thresholds()
+        _write_json(os.path.join(self.state_dir, "status.json"),
+                    {"chunk_latency_ms": self.chunk_latency_ms, "error": self.error, "thresholds": self.thresholds})
+
+    def _run(self):
+        stop_path = os.path.join(self.state_dir, "stop")
+        next_status = 0.0
+        try:
+            while not self._stop.is_set() and not os.path.exists(stop_path):
+                if time.monotonic() >= next_status:
+                    self._write_status()
+                    next_status = time.monotonic() + STATUS_INTERVAL_SECONDS
+                chunk = self.source.read_chunk()
+                if chunk.shape[1] == 0:
+                    continue
+                started = time.perf_counter()
+                processed = self.processor.process(chunk)
+                self.raw.write(chunk)
+                self.processed.write(processed)
+                self.chunk_latency_ms = (time.perf_counter() - started) * 1000
+        except OSError as e:
+            self.error = str(e)
+            self._write_status()
+        finally:
+            self.source.close()
+        if self._stop.is_set() or os.path.exists(stop_path):
+            # Stopped on request: nothing left to show, readers already hold their maps
+            self.raw.close()
+            self.processed.close()
+            shutil.rmtree(self.state_dir, ignore_errors=True)
+
+
+class LiveView:
+    """Read-only view of an acquisition running in another worker process."""
+
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        with open(os.path.join(state_dir, "meta.json")) as file:
+            meta = json.load(file)
+        self.raw = RingBuffer(meta["n_channels"], meta["capacity"], path=os.path.join(state_dir, "raw.buf"), create=False)
+        self.processed = RingBuffer(meta["n_channels"], meta["capacity"], path=os.path.join(state_dir, "processed.buf"), create=False)
+
+    @property
+    def chunk_latency_ms(self):
+        return _read_status(self.state_dir)["chunk_latency_ms"]
+
+    @property
+    def error(self):
+        return _read_status(self.state_dir)["error"]
+
+    @property
+    def thresholds(self):
+        return _read_status(self.state_dir).get("thresholds", {})
+
+    @property
+    def running(self):
+        return os.path.isdir(self.state_dir)
+
+
+def _read_status(state_dir):
+    try:
+        with open(os.path.join(state_dir, "status.json")) as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"chunk_latency_ms": 0.0, "error": None, "thresholds": {}}
+
+
+def _write_json(path, value):
+    with open(path + ".tmp", "w") as file:
+        json.dump(value, file)
+    os.replace(path + ".tmp", path)
+
+
+def session_dir(session_id):
+    """Directory holding the acquisitions of a browser session."""
+    return os.path.join(LIVE_STATE_DIR, hashlib.sha256(str(session_id).encode()).hexdigest()[:32])
+
+
+def new_state_dir(session_id):
+    """Fresh state directory for a new acquisition of the session."""
+    return os.path.join(session_dir(session_id), uuid.uuid4().hex)
+
+
+def _current_dir(session_id):
+    try:
+        with open(os.path.join(session_dir(session_id), "current.json")) as file:
+            return json.load(file)["state_dir"]
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+# Acquisitions started by this process and views of those running elsewhere
+_acquisitions = {}
+_views = {}
+_acquisitions_lock = threading.Lock()
+
+
+def start_acquisition(session_id, acquisition):
+    """Register and start an acquisition, stopping the session's previous one in any process."""
+    stop_acquisition(session_id)
+    with _acquisitions_lock:
+        _acquisitions[session_id] = acquisition
+    _write_json(os.path.join(session_dir(session_id), "current.json"), {"state_dir": acquisition.state_dir})
+    return acquisition.start()
+
+
+def get_acquisition(session_id):
+    """The session's running acquisition (LiveAcquisition or LiveView), or None."""
+    state_dir = _current_dir(session_id)
+    with _acquisitions_lock:
+        if state_dir is None or not os.path.isdir(state_dir):
+            return None
+        acquisition = _acquisitions.get(session_id)
+        if acquisition is not None and acquisition.state_dir == state_dir:
+            return acquisition
+        view = _views.get(session_id)
+        if view is None or view.state_dir != state_dir:
+            try:
+                view = _views[session_id] = LiveView(state_dir)
+            except FileNotFoundError:
+                return None  # stopped meanwhile
+        return view
+
+
+def stop_acquisition(session_id):
+    """Stop the session's acquisition, whichever process runs it."""
+    state_dir = _current_dir(session_id)
+    if state_dir is not None and os.path.isdir(state_dir):
+        if _read_status(state_dir)["error"]:
+            # The reading thread already ended with an error; only its state is left
+            shutil.rmtree(state_dir, ignore_errors=True)
+        else:
+            try:
+                # Picked up by the reading thread of the owning process
+                open(os.path.join(state_dir, "stop"), "w").close()
+            except FileNotFoundError:
+                pass
+    with _acquisitions_lock:
+        acquisition = _acquisitions.pop(session_id, None)
+        _views.pop(session_id, None)
+    if acquisition is not None:
+        acquisition.stop()
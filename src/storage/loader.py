@@ -0,0 +1,73 @@
+import os
+import pickle
+
+from src.metrics import register_cache
+from src.storage.cache import LRUCache
+from src.storage.columnar import find_store, is_store, open_store
+from src.storage.shared_cache import fingerprint_key, shared_cache
+
+# Byte budget for recordings held in memory by this process (default 1 GiB).
+# It only covers in-memory arrays (e.g. a .pkl read without the shared cache):
+# recordings from the shared cache or a columnar store are memory-mapped,
+# count as 0 bytes and are bounded by LOADER_CACHE_ENTRIES alone
+LOADER_CACHE_BYTES = int(os.environ.get("EMG_LOADER_CACHE_BYTES", 1024 ** 3))
+
+# Recordings kept open by this process; memory-mapped ones do not count
+# against the byte budget, so this bounds their number (default 16)
+LOADER_CACHE_ENTRIES = int(os.environ.get("EMG_LOADER_CACHE_ENTRIES", 16))
+
+# Process-wide cache of loaded recordings, keyed by file fingerprint
+loader_cache = LRUCache(LOADER_CACHE_BYTES, max_entries=LOADER_CACHE_ENTRIES)
+register_cache("loader", loader_cache)
+
+
+def file_fingerprint(file_path):
+    """Identify a file by absolute path, modification time and size."""
+    stat = os.stat(file_path)
+    return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+def read_pickle(file_path):
+    """Unpickle a recording from disk without caching."""
+    with open(file_path, 'rb') as file:
+        return pickle.load(file)
+
+
+def read_recording(file_path):
+    """Read a recording from a columnar store or a .pkl file without caching."""
+    if is_store(file_path):
+        return open_store(file_path)
+    store_dir = find_store(file_path)
+    if store_dir is not None:
+        return open_store(store_dir)
+    return read_pickle(file_path)
+
+
+def load_recording(file_path):
+    """
+    Load a recording, reusing the cached copy while the file is unchanged.
+
+    file_path may be a .pkl file or a columnar store directory. A .pkl file
+    with an up-to-date store next to it is opened through the store, so its
+    arrays are memory-mapped instead of unpickled. Other .pkl files are
+    converted once per host into the shared dataset cache and memory-mapped
+    from there, so worker processes share one copy.
+
+    A modified file gets a new fingerprint, so it is read again and the stale
+    entry for the same path is dropped.
+    """
+    key = file_fingerprint(file_path)
+    data = loader_cache.get(key)
+    if data is None:
+        for old_key in loader_cache.keys():
+            if old_key[0] == key[0]:
+                loader_cache.pop(old_key)
+        if is_store(file_path) or find_store(file_path) is not None:
+            data = read_recording(file_path)
+        else:
+            data = shared_cache.open(fingerprint_key(key))
+            if data is None:
+                shared_cache.add(fingerprint_key(key), file_path)
+                data = shared_cache.open(fingerprint_key(key))
+        loader_cache.put(key, data)
+    return data
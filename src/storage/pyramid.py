@@ -0,0 +1,253 @@
+import json
+import os
+import shutil
+import sys
+import threading
+
+import numpy as np
+
+from src.metrics import register_cache
+from src.processing.downsampling import MAX_POINTS, minmax_downsample, visible_range
+from src.processing.precision import as_working
+from src.storage.cache import LRUCache
+from src.storage.loader import file_fingerprint, read_recording
+
+# A pyramid is a directory next to the recording holding min/max envelopes of
+# every channel at power-of-two decimation levels plus a small JSON header
+PYRAMID_SUFFIX = ".pyramid"
+HEADER_FILE = "header.json"
+FORMAT_VERSION = 1
+
+# Samples per bucket at the finest level; coarser levels double it
+BASE_BUCKET = 16
+
+# Levels stop once a channel fits in this many buckets
+MIN_BUCKETS = MAX_POINTS // 2
+
+# Samples reduced at once while building level 0 (multiple of BASE_BUCKET)
+_BUILD_BLOCK = BASE_BUCKET * 65536
+
+# Open pyramids are memory-mapped; the cache only avoids re-reading headers
+pyramid_cache = LRUCache(64 * 1024 ** 2, max_entries=64)
+register_cache("pyramid", pyramid_cache)
+_build_lock = threading.Lock()
+
+
+def pyramid_path_for(file_path):
+    """Pyramid directory of a recording: next to it, with the .pyramid suffix."""
+    return os.path.splitext(os.path.normpath(file_path))[0] + PYRAMID_SUFFIX
+
+
+def _reduce_samples(signal, bucket):
+    """
+    Level 0 of one channel: min, max and whether the min comes first, per bucket.
+
+    The last bucket may be shorter than the others.
+    """
+    n = len(signal)
+    n_buckets = -(-n // bucket)
+    mins = np.empty(n_buckets, dtype=signal.dtype)
+    maxs = np.empty(n_buckets, dtype=signal.dtype)
+    min_first = np.empty(n_buckets, dtype=bool)
+    for start in range(0, n, _BUILD_BLOCK):
+        block = np.asarray(signal[start:start + _BUILD_BLOCK])
+        n_full = len(block) // bucket
+        first = start // bucket
+        if n_full:
+            body = block[:n_full * bucket].reshape(n_full, bucket)
+            arg_min = body.argmin(axis=1)
+            arg_max = body.argmax(axis=1)
+            rows = np.arange(n_full)
+            mins[first:first + n_full] = body[rows, arg_min]
+            maxs[first:first + n_full] = body[rows, arg_max]
+            min_first[first:first + n_full] = arg_min <= arg_max
+        if n_full * bucket < len(block):
+            tail = block[n_full * bucket:]
+            mins[first + n_full] = tail.min()
+            maxs[first + n_full] = tail.max()
+            min_first[first + n_full] = tail.argmin() <= tail.argmax()
+    return mins, maxs, min_first
+
+
+def _merge_pairs(mins, maxs, min_first):
+    """Next level: merge buckets 2k and 2k + 1 (an odd last bucket is kept as is)."""
+    if len(mins) % 2:
+        mins = np.append(mins, mins[-1])
+        maxs = np.append(maxs, maxs[-1])
+        min_first = np.append(min_first, min_first[-1])
+    a_min, b_min = mins[0::2], mins[1::2]
+    a_max, b_max = maxs[0::2], maxs[1::2]
+    a_first, b_first = min_first[0::2], min_first[1::2]
+
+    min_from_b = b_min < a_min
+    max_from_b = b_max > a_max
+    # Extremes from different halves are ordered by the halves themselves
+    merged_first = np.where(min_from_b == max_from_b, np.where(min_from_b, b_first, a_first), max_from_b)
+    return np.where(min_from_b, b_min, a_min), np.where(max_from_b, b_max, a_max), merged_first
+
+
+def build_levels(signal, base_bucket=BASE_BUCKET, min_buckets=MIN_BUCKETS):
+    """
+    Min/max envelopes of a 1-D signal at buckets of base_bucket * 2**k samples.
+
+    Returns:
+        list: (mins, maxs, min_first) per level, finest first.
+    """
+    levels = [_reduce_samples(signal, base_bucket)]
+    while len(levels[-1][0]) > min_buckets:
+        levels.append(_merge_pairs(*levels[-1]))
+    return levels
+
+
+def write_pyramid(emg, pyramid_dir, source=None, base_bucket=BASE_BUCKET):
+    """
+    Build and write the pyramid of an EMG array (channels, samples).
+
+    The directory is written under a temporary name and moved into place, so
+    readers never see a partial pyramid. If another worker published a
+    complete pyramid of the same source meanwhile, that one is kept.
+    """
+    tmp_dir = f"{pyramid_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    per_channel = [build_levels(channel, base_bucket) for channel in emg]
+    header = {
+        "version": FORMAT_VERSION,
+        "source": source,
+        "n_channels": len(per_channel),
+        "n_samples": int(np.shape(emg)[1]),
+        "base_bucket": base_bucket,
+        "levels": [],
+    }
+    for level in range(len(per_channel[0])):
+        for index, name in enumerate(("min", "max", "min_first")):
+            array = np.stack([levels[level][index] for levels in per_channel])
+            np.save(os.path.join(tmp_dir, f"level{level}_{name}.npy"), array)
+        header["levels"].append({"bucket": base_bucket * 2 ** level, "n_buckets": len(per_channel[0][level][0])})
+
+    with open(os.path.join(tmp_dir, HEADER_FILE), "w") as file:
+        json.dump(header, file, indent=2)
+
+    if _is_current(pyramid_dir, source):
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return pyramid_dir
+    if os.path.isdir(pyramid_dir):
+        # Outdated pyramid: move it aside first, readers may have it mapped
+        try:
+            os.replace(pyramid_dir, f"{tmp_dir}.old")
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(f"{tmp_dir}.old", ignore_errors=True)
+    try:
+        os.replace(tmp_dir, pyramid_dir)
+    except OSError:
+        # Another worker published first (the target is no longer empty)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not _is_current(pyramid_dir, source):
+            raise
+    return pyramid_dir
+
+
+def _is_current(pyramid_dir, source):
+    """True if pyramid_dir holds a complete pyramid of source in the current format."""
+    try:
+        with open(os.path.join(pyramid_dir, HEADER_FILE)) as file:
+            header = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    return header.get("version") == FORMAT_VERSION and header.get("source") == source
+
+
+def _source_of(file_path):
+    path, mtime_ns, size = file_fingerprint(file_path)
+    return {"path": path, "mtime_ns": mtime_ns, "size": size}
+
+
+def open_pyramid(pyramid_dir):
+    """Open a pyramid; level arrays are memory-mapped read-only."""
+    with open(os.path.join(pyramid_dir, HEADER_FILE)) as file:
+        header = json.load(file)
+    header["arrays"] = [
+        tuple(np.load(os.path.join(pyramid_dir, f"level{level}_{name}.npy"), mmap_mode='r')
+              for name in ("min", "max", "min_first"))
+        for level in range(len(header["levels"]))
+    ]
+    return header
+
+
+def ensure_pyramid(file_path, emg=None):
+    """
+    Return the up-to-date pyramid of a recording, building it on first use.
+
+    Parameters:
+        file_path (str): Recording (.pkl file or columnar store) the pyramid belongs to.
+        emg (array-like): EMG of the recording if already loaded; read from file_path otherwise.
+    """
+    key = file_fingerprint(file_path)
+    pyramid = pyramid_cache.get(key)
+    if pyramid is not None:
+        return pyramid
+
+    pyramid_dir = pyramid_path_for(file_path)
+    with _build_lock:
+        source = _source_of(file_path)
+        pyramid = None
+        if os.path.isfile(os.path.join(pyramid_dir, HEADER_FILE)):
+            pyramid = open_pyramid(pyramid_dir)
+            if pyramid["version"] != FORMAT_VERSION or pyramid["source"] != source:
+                pyramid = None
+        if pyramid is None:
+            if emg is None:
+                emg = read_recording(file_path)['emg']
+            pyramid = open_pyramid(write_pyramid(emg, pyramid_dir, source=source))
+    pyramid_cache.put(key, pyramid)
+    return pyramid
+
+
+def pyramid_downsample(pyramid, signal, channel, start=0, stop=None, n_out=MAX_POINTS):
+    """
+    Min/max reduction of signal[start:stop] served from the pyramid.
+
+    Uses the finest level with at most n_out / 2 buckets in the range, so the
+    work is proportional to n_out, not to the range length. Short ranges are
+    reduced from the raw signal instead.
+
+    Returns:
+        tuple: (positions, values); positions are (fractional) sample indices.
+    """
+    n_total = pyramid["n_samples"]
+    start = max(0, int(start))
+    stop = n_total if stop is None else min(n_total, int(stop))
+    n_buckets_max = max(1, n_out // 2)
+    # Samples per bucket needed to stay within n_out points
+    needed = (stop - start) / n_buckets_max
+    if stop - start <= n_out or needed < pyramid["base_bucket"]:
+        # At most n_out / 2 * base_bucket samples: cheap to reduce directly
+        return minmax_downsample(signal, n_out=n_out, start=start, stop=stop)
+
+    buckets = [info["bucket"] for info in pyramid["levels"]]
+    level = next((index for index, bucket in enumerate(buckets) if bucket >= needed), len(buckets) - 1)
+
+    bucket = pyramid["levels"][level]["bucket"]
+    first = start // bucket
+    last = -(-stop // bucket)
+    mins, maxs, min_first = (np.asarray(array[channel, first:last]) for array in pyramid["arrays"][level])
+
+    bucket_starts = (np.arange(first, last) * bucket).astype(float)
+    positions = np.stack([bucket_starts + bucket / 4, bucket_starts + 3 * bucket / 4], axis=1).ravel()
+    values = np.where(min_first[:, None], np.stack([mins, maxs], axis=1), np.stack([maxs, mins], axis=1)).ravel()
+    return positions, values
+
+
+def pyramid_trace(pyramid, signal, channel, fs, x_range=None, n_out=MAX_POINTS):
+    """Return (time, values) of one channel for the visible x_range (seconds); values are in the working precision."""
+    start, stop = visible_range(x_range, fs, pyramid["n_samples"])
+    positions, values = pyramid_downsample(pyramid, signal, channel, start, stop, n_out)
+    return positions / fs, as_working(values)
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.storage.pyramid data/myocontrol_data_1.pkl [...]
+    for path in sys.argv[1:]:
+        print(f"{path} -> {pyramid_path_for(path)} ({len(ensure_pyramid(path)['levels'])} levels)")
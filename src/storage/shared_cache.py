@@ -0,0 +1,242 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from src.metrics import register_cache
+from src.processing.precision import get_precision, working_dtype
+from src.storage.columnar import STORE_SUFFIX, ingest_pickle, is_store, open_store
+
+# Datasets shared by all worker processes of a host live in this directory
+SHARED_CACHE_DIR = os.environ.get("EMG_SHARED_CACHE_DIR", os.path.join(tempfile.gettempdir(), "emg-shared-cache"))
+
+# Disk budget of the shared directory (default 8 GiB); least recently used datasets are removed first
+SHARED_CACHE_BYTES = int(os.environ.get("EMG_SHARED_CACHE_BYTES", 8 * 1024 ** 3))
+
+# Datasets not used for this many seconds are removed (default 2 hours)
+SHARED_CACHE_TTL_SECONDS = float(os.environ.get("EMG_SHARED_CACHE_TTL_SECONDS", 2 * 60 * 60))
+
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+
+# Conversions are serialized per key through one of this many lock files in
+# cache_dir/locks (keys share a lock file by hash, so the files never pile up)
+INGEST_LOCK_STRIPES = 256
+
+# A process records a dataset's last use in the index at most this often
+TOUCH_INTERVAL_SECONDS = 30
+
+
+def _tree_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class SharedDatasetCache:
+    """
+    Host-wide cache of recordings, shared zero-copy by all worker processes.
+
+    Every dataset is a columnar store <key>.emgcol in cache_dir; processes
+    open it memory-mapped, so its pages sit once in the OS page cache however
+    many workers read it. Derived data stored as <key>.<suffix> (e.g. the
+    min/max pyramid) is removed together with the dataset.
+
+    A JSON index, guarded by an fcntl lock, records per dataset its size, last
+    use and owning sessions. Datasets with owners (uploads) are only visible
+    to those sessions; datasets without owners (recordings read from disk)
+    are visible to everyone. The index enforces the byte budget (LRU) and the
+    idle TTL for all processes at once.
+
+    Floating point arrays are stored in the working precision; float32 copies
+    are kept under their own key, so processes configured for float64 never
+    read them.
+    """
+
+    def __init__(self, cache_dir=SHARED_CACHE_DIR, max_bytes=SHARED_CACHE_BYTES, ttl=SHARED_CACHE_TTL_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self.ttl = ttl
+        self._opened = {}
+        self._touched = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @contextmanager
+    def _index(self, write=True):
+        """Hold the index lock (threads and processes) and yield the index dict."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        with self._lock, open(os.path.join(self.cache_dir, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(index_path) as file:
+                        index = json.load(file)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    index = {}
+                yield index
+                if write:
+                    with open(index_path + ".tmp", "w") as file:
+                        json.dump(index, file)
+                    os.replace(index_path + ".tmp", index_path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _ingest_lock(self, key):
+        """Exclusive lock (threads and processes) for converting the dataset key."""
+        lock_dir = os.path.join(self.cache_dir, "locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        stripe = int(hashlib.sha256(key.encode()).hexdigest(), 16) % INGEST_LOCK_STRIPES
+        # flock locks belong to the open file, so threads with their own open() exclude each other too
+        with open(os.path.join(lock_dir, f"{stripe}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _is_cached(self, key):
+        with self._index(write=False) as index:
+            return key in index and is_store(self.store_dir(key))
+
+    def _dataset_key(self, key):
+        precision = get_precision()
+        return key if precision == "float64" else f"{key}-{precision}"
+
+    def store_dir(self, key):
+        return os.path.join(self.cache_dir, key + STORE_SUFFIX)
+
+    def _remove(self, index, key):
+        index.pop(key, None)
+        self._opened.pop(key, None)
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(key + "."):
+                path = os.path.join(self.cache_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+
+    def _enforce_limits(self, index, keep=None):
+        """Expire idle datasets, then evict least recently used ones above the budget."""
+        now = time.time()
+        for key in [key for key, entry in index.items() if key != keep and now - entry["last_access"] > self.ttl]:
+            self._remove(index, key)
+            self.expirations += 1
+        by_age = sorted((entry["last_access"], key) for key, entry in index.items() if key != keep)
+        total = sum(entry["bytes"] for entry in index.values())
+        for _, key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= index[key]["bytes"]
+            self._remove(index, key)
+            self.evictions += 1
+
+    def add(self, key, file_path, owner=None):
+        """
+        Make a .pkl recording available under key, converting it once per host.
+
+        Parameters:
+            key (str): Dataset key (e.g. content hash of an upload).
+            file_path (str): Pickled recording to convert if key is not cached yet.
+            owner (str): Session that may read the dataset; None makes it public.
+
+        Returns:
+            str: The columnar store directory of the dataset.
+        """
+        key = self._dataset_key(key)
+        store_dir = self.store_dir(key)
+        if not self._is_cached(key):
+            # Concurrent first loads of the same recording convert it once; the
+            # others wait here and find it cached. The index lock is not held
+            # meanwhile, so other datasets stay usable during the conversion.
+            with self._ingest_lock(key):
+                if not self._is_cached(key):
+                    ingest_pickle(file_path, store_dir, float_dtype=working_dtype())
+                self._register(key, store_dir, owner)
+        else:
+            self._register(key, store_dir, owner)
+        self._touched[key] = time.monotonic()
+        return store_dir
+
+    def _register(self, key, store_dir, owner):
+        with self._index() as index:
+            entry = index.setdefault(key, {"bytes": _tree_bytes(store_dir), "owners": []})
+            if owner is not None and owner not in entry["owners"]:
+                entry["owners"].append(owner)
+            entry["last_access"] = time.time()
+            self._enforce_limits(index, keep=key)
+
+    def _visible(self, entry, owner):
+        if entry is None:
+            return False
+        return owner in entry["owners"] if entry["owners"] else True
+
+    def path(self, key, owner=None):
+        """Return the store directory of key if it is cached and visible to owner, else None."""
+        key = self._dataset_key(key)
+        with self._index(write=False) as index:
+            entry = index.get(key)
+        if not self._visible(entry, owner) or not is_store(self.store_dir(key)):
+            return None
+        if time.monotonic() - self._touched.get(key, float("-inf")) > TOUCH_INTERVAL_SECONDS:
+            with self._index() as index:
+                if key in index:
+                    index[key]["last_access"] = time.time()
+            self._touched[key] = time.monotonic()
+        return self.store_dir(key)
+
+    def open(self, key, owner=None):
+        """Return the memory-mapped recording of key, or None if it is unknown, evicted or not visible."""
+        store_dir = self.path(key, owner)
+        key = self._dataset_key(key)
+        if store_dir is None:
+            self._opened.pop(key, None)
+            self.misses += 1
+            return None
+        data = self._opened.get(key)
+        if data is None:
+            data = self._opened[key] = open_store(store_dir)
+        self.hits += 1
+        return data
+
+    def stats(self):
+        """Host-wide entries, bytes and sessions plus this process's hit/miss counters."""
+        with self._index() as index:
+            self._enforce_limits(index)
+            owners = set()
+            for entry in index.values():
+                owners.update(entry["owners"])
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(index),
+                "uploads": sum(1 for entry in index.values() if entry["owners"]),
+                "bytes": sum(entry["bytes"] for entry in index.values()),
+                "max_bytes": self.max_bytes,
+                "sessions": len(owners),
+            }
+
+
+def fingerprint_key(fingerprint):
+    """Dataset key of a file identified by file_fingerprint (path, mtime, size)."""
+    return hashlib.sha256(repr(tuple(fingerprint)).encode()).hexdigest()
+
+
+# Process-wide handle on the host-wide cache
+shared_cache = SharedDatasetCache()
+register_cache("shared", shared_cache)
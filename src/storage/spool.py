@@ -0,0 +1,252 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import jsonify, request
+
+# Uploads are streamed into this directory in chunks (shared by all workers)
+SPOOL_DIR = os.environ.get("EMG_UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "emg-upload-spool"))
+
+# Chunk size the browser is asked to use (default 8 MiB)
+CHUNK_BYTES = int(os.environ.get("EMG_UPLOAD_CHUNK_BYTES", 8 * 1024 ** 2))
+
+# Spooled files not touched for this many seconds are deleted (default 1 day)
+SPOOL_TTL_SECONDS = float(os.environ.get("EMG_UPLOAD_SPOOL_TTL_SECONDS", 24 * 60 * 60))
+
+# Request bodies are copied to disk in blocks of this size
+_COPY_BYTES = 1024 ** 2
+
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadSpool:
+    """
+    Resumable chunked uploads streamed to disk.
+
+    An upload is created with its file name and size and then receives its
+    bytes in order through write_chunk. After an interruption the client asks
+    for status() and continues at 'received'. Every upload belongs to the
+    session that created it; path() only returns finished uploads of the
+    asking session.
+
+    State lives in <id>.json next to the data (<id>.part while incomplete,
+    <id><suffix> when done), so any worker process can serve any request.
+    Chunk writes take an fcntl lock on <id>.lock, which serializes them across
+    threads and processes.
+    """
+
+    def __init__(self, spool_dir=SPOOL_DIR, ttl=SPOOL_TTL_SECONDS):
+        self.spool_dir = spool_dir
+        self.ttl = ttl
+
+    def _meta_path(self, upload_id):
+        if not _ID_PATTERN.match(upload_id or ""):
+            raise KeyError(upload_id)
+        return os.path.join(self.spool_dir, upload_id + ".json")
+
+    @contextmanager
+    def _upload_lock(self, upload_id):
+        """Exclusive lock on one upload, held across worker processes."""
+        lock_path = self._meta_path(upload_id)[:-len(".json")] + ".lock"
+        # flock locks belong to the open file, so concurrent threads exclude each other too
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self, upload_id):
+        try:
+            with open(self._meta_path(upload_id)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            raise KeyError(upload_id) from None
+
+    def _write_meta(self, meta):
+        path = self._meta_path(meta["upload_id"])
+        with open(path + ".tmp", "w") as file:
+            json.dump(meta, file)
+        os.replace(path + ".tmp", path)
+
+    def _data_path(self, meta):
+        if meta["received"] < meta["size"]:
+            return os.path.join(self.spool_dir, meta["upload_id"] + ".part")
+        return os.path.join(self.spool_dir, meta["upload_id"] + meta["suffix"])
+
+    def create(self, session_id, filename, size):
+        """
+        Start an upload.
+
+        Parameters:
+            session_id (str): Browser session the upload belongs to.
+            filename (str): Original file name; only its extension is used on disk.
+            size (int): Total size in bytes.
+
+        Returns:
+            dict: Upload status (see status()).
+        """
+        if not session_id or size < 0:
+            raise ValueError("An upload needs a session and a non-negative size.")
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.purge_expired()
+
+        meta = {
+            "upload_id": uuid.uuid4().hex,
+            "session_id": session_id,
+            "filename": os.path.basename(filename),
+            "suffix": os.path.splitext(filename)[1].lower(),
+            "size": int(size),
+            "received": 0,
+        }
+        open(os.path.join(self.spool_dir, meta["upload_id"] + ".part"), "wb").close()
+        if meta["size"] == 0:
+            os.replace(os.path.join(self.spool_dir, meta["upload_id"] + ".part"), self._data_path(meta))
+        self._write_meta(meta)
+        return self.status(meta["upload_id"])
+
+    def status(self, upload_id):
+        """Return filename, size, received bytes and completion of an upload (KeyError if unknown)."""
+        meta = self._read_meta(upload_id)
+        return {
+            "upload_id": upload_id,
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "received": meta["received"],
+            "complete": meta["received"] >= meta["size"],
+            "chunk_bytes": CHUNK_BYTES,
+        }
+
+    def write_chunk(self, upload_id, offset, stream, length):
+        """
+        Append one chunk of an upload.
+
+        Parameters:
+            upload_id (str): Upload handle from create().
+            offset (int): Position of the chunk; must equal the bytes received so far.
+            stream: File-like object the chunk is read from.
+            length (int): Chunk size in bytes.
+
+        Returns:
+            dict: Upload status after the write.
+
+        Raises:
+            KeyError: Unknown upload.
+            ValueError: offset does not match, or the chunk runs past the file size.
+        """
+        self._read_meta(upload_id)  # KeyError before creating a lock file for an unknown id
+        with self._upload_lock(upload_id):
+            meta = self._read_meta(upload_id)
+            if offset != meta["received"]:
+                raise ValueError(f"Expected offset {meta['received']}, got {offset}.")
+            if offset + length > meta["size"]:
+                raise ValueError("Chunk extends past the announced file size.")
+
+            part_path = self._data_path(meta)
+            with open(part_path, "r+b") as file:
+                file.seek(offset)
+                file.truncate()
+                remaining = length
+                while remaining:
+                    block = stream.read(min(_COPY_BYTES, remaining))
+                    if not block:
+                        break
+                    file.write(block)
+                    remaining -= len(block)
+            if remaining:
+                raise ValueError("Chunk ended early.")
+
+            meta["received"] = offset + length
+            if meta["received"] == meta["size"]:
+                os.replace(part_path, self._data_path(meta))
+            self._write_meta(meta)
+        return self.status(upload_id)
+
+    def path(self, session_id, upload_id):
+        """Return the file of a finished upload of this session, or None."""
+        try:
+            meta = self._read_meta(upload_id)
+        except KeyError:
+            return None
+        if meta["session_id"] != session_id or meta["received"] < meta["size"]:
+            return None
+        path = self._data_path(meta)
+        if not os.path.exists(path):
+            return None
+        # Uploads in use are kept alive by purge_expired
+        os.utime(self._meta_path(upload_id))
+        return path
+
+    def purge_expired(self):
+        """Delete uploads (and anything derived from them) not modified for ttl seconds."""
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.spool_dir):
+            upload_id, ext = os.path.splitext(name)
+            if ext != ".json" or not _ID_PATTERN.match(upload_id):
+                continue
+            try:
+                if os.path.getmtime(os.path.join(self.spool_dir, name)) >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            for other in os.listdir(self.spool_dir):
+                if other.startswith(upload_id):
+                    target = os.path.join(self.spool_dir, other)
+                    if os.path.isdir(target):
+                        shutil.rmtree(target, ignore_errors=True)
+                    else:
+                        try:
+                            os.remove(target)
+                        except FileNotFoundError:
+                            pass
+
+
+# Process-wide spool used by the upload routes and the pages
+upload_spool = UploadSpool()
+
+
+def register_routes(server):
+    """
+    Chunked upload API on the Flask server.
+
+        POST /api/uploads                  {"session_id", "filename", "size"} → status
+        GET  /api/uploads/<id>             → status (to resume after an interruption)
+        PUT  /api/uploads/<id>?offset=N    raw chunk bytes → status; 409 with the
+                                           current status if N is not the next offset
+    """
+    @server.route("/api/uploads", methods=["POST"])
+    def create_upload():
+        body = request.get_json(silent=True) or {}
+        try:
+            status = upload_spool.create(body.get("session_id"), str(body.get("filename", "")), int(body.get("size", -1)))
+        except (TypeError, ValueError) as e:
+            return jsonify(error=str(e)), 400
+        return jsonify(status), 201
+
+    @server.route("/api/uploads/<upload_id>", methods=["GET"])
+    def upload_status(upload_id):
+        try:
+            return jsonify(upload_spool.status(upload_id))
+        except KeyError:
+            return jsonify(error="Unknown upload"), 404
+
+    @server.route("/api/uploads/<upload_id>", methods=["PUT"])
+    def upload_chunk(upload_id):
+        try:
+            offset = int(request.args.get("offset", -1))
+            return jsonify(upload_spool.write_chunk(upload_id, offset, request.stream, request.content_length or 0))
+        except KeyError:
+            return jsonify(error="Unknown upload"), 404
+        except ValueError as e:
+            try:
+                status = upload_spool.status(upload_id)
+            except KeyError:
+                return jsonify(error="Unknown upload"), 404
+            status["error"] = str(e)
+            return jsonify(status), 409
@@ -0,0 +1,75 @@
+import hashlib
+
+from flask import jsonify
+
+from src.storage.pyramid import ensure_pyramid
+from src.storage.shared_cache import shared_cache
+
+# Prefix of data-dropdown values that refer to uploads instead of file paths
+UPLOAD_PREFIX = "upload:"
+
+
+def file_digest(file_path, block_bytes=1024 ** 2):
+    """SHA-256 of a file, read in blocks."""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_bytes), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class UploadStore:
+    """
+    Session-scoped store for uploaded recordings.
+
+    Recordings are keyed by the SHA-256 of the uploaded bytes, so identical
+    uploads are held once, and every entry remembers which sessions uploaded
+    it. A session can only read the uploads it made itself.
+
+    Uploads arrive as files in the upload spool and are converted into the
+    host-wide shared dataset cache (with their min/max pyramid). Ownership,
+    the LRU budget and the idle TTL are kept in the shared index, so an upload
+    handled by one worker process is visible to all others.
+    """
+
+    def __init__(self, cache=None):
+        self._cache = cache if cache is not None else shared_cache
+
+    def put(self, session_id, file_path):
+        """
+        Store an uploaded .pkl file for a session.
+
+        Parameters:
+            session_id (str): Browser session the upload belongs to.
+            file_path (str): Spooled copy of the uploaded file.
+
+        Returns:
+            str: Content hash identifying the upload.
+        """
+        digest = file_digest(file_path)
+        store_dir = self._cache.add(digest, file_path, owner=session_id)
+        ensure_pyramid(store_dir)
+        return digest
+
+    def get(self, session_id, digest):
+        """Return the upload if it belongs to the session and is still cached, else None."""
+        return self._cache.open(digest, owner=session_id)
+
+    def path(self, session_id, digest):
+        """Return the columnar store of an upload of this session, or None."""
+        return self._cache.path(digest, owner=session_id)
+
+    def stats(self):
+        """Return bytes held, entry count and hit/miss counters."""
+        return self._cache.stats()
+
+
+# Process-wide upload store used by the EMG page
+upload_store = UploadStore()
+
+
+def register_routes(server):
+    """Expose upload store occupancy on the Flask server."""
+    @server.route("/api/upload-cache")
+    def upload_cache_stats():
+        return jsonify(upload_store.stats())